@@ -0,0 +1,618 @@
+# Course:      CS261 - Data Structures
+# Assignment:  6
+# Description: Benchmarks for the separate chaining (SC) and open
+#              addressing (OA) HashMaps.
+#              Run with: python bench_hash_maps.py
+#              The workload suite, with the built in dict as a baseline:
+#              python bench_hash_maps.py suite --n 20000 --json out.json
+
+
+import argparse
+import itertools
+import json
+import os
+import pickle
+import platform
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import hash_map_oa
+import hash_map_oa_flat
+import hash_map_rh
+import hash_map_sc
+import hash_map_sc_array
+import hash_map_sc_concurrent
+from a6_include import DynamicArray, fnv1a_hash, hash_function_1, hash_function_2, mix64_hash
+
+
+def _time(fn) -> float:
+    """Return the wall clock seconds taken by calling fn()."""
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench_batch(n: int = 20000) -> None:
+    """
+    Compare the per-key cost of looped put/get against put_many/get_many
+    on both maps, starting from the default small capacity
+    """
+    keys = ['session-' + str(i) for i in range(n)]
+    pairs = [(key, i) for i, key in enumerate(keys)]
+
+    print(f"\nBatch API, {n} keys (ns per key)")
+    print(f"{'map':<6}{'put':>10}{'put_many':>10}{'get':>10}{'get_many':>10}")
+    for name, module in (('SC', hash_map_sc), ('OA', hash_map_oa)):
+        m = module.HashMap(11, hash_function_2)
+
+        def looped_put():
+            for key, value in pairs:
+                m.put(key, value)
+
+        def looped_get():
+            for key in keys:
+                m.get(key)
+
+        put = _time(looped_put)
+        get = _time(looped_get)
+
+        m = module.HashMap(11, hash_function_2)
+        put_many = _time(lambda: m.put_many(pairs))
+        get_many = _time(lambda: m.get_many(keys))
+
+        print(f"{name:<6}" + ''.join(f"{t / n * 1e9:>10.0f}" for t in (put, put_many, get, get_many)))
+
+
+def bench_storage(n: int = 100000) -> None:
+    """
+    Compare the HashEntry slot layout of hash_map_oa against the flat
+    array layout of hash_map_oa_flat: bytes per entry and lookups per
+    second. Keys are hashed with the built in hash so the comparison is
+    not skewed by the sample hash functions
+    """
+    keys = ['session-' + str(i) for i in range(n)]
+    pairs = [(key, i) for i, key in enumerate(keys)]
+
+    print(f"\nOA storage layout, {n} keys")
+    print(f"{'layout':<12}{'bytes/entry':>12}{'lookups/s':>12}")
+    for name, module in (('HashEntry', hash_map_oa), ('flat', hash_map_oa_flat)):
+        tracemalloc.start()
+        m = module.HashMap(11, hash)
+        m.put_many(pairs)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        def lookups():
+            for key in keys:
+                m.get(key)
+
+        print(f"{name:<12}{used / n:>12.1f}{n / _time(lookups):>12.0f}")
+
+
+def bench_chaining(n: int = 100000) -> None:
+    """
+    Compare the LinkedList buckets of hash_map_sc against the array
+    buckets of hash_map_sc_array: bytes per entry, plus get and
+    contains_key rates on the short chains of a table at load ~0.75
+    """
+    keys = ['session-' + str(i) for i in range(n)]
+    pairs = [(key, i) for i, key in enumerate(keys)]
+
+    print(f"\nSC bucket layout, {n} keys")
+    print(f"{'layout':<12}{'bytes/entry':>12}{'gets/s':>12}{'contains/s':>12}")
+    for name, module in (('LinkedList', hash_map_sc), ('array', hash_map_sc_array)):
+        tracemalloc.start()
+        m = module.HashMap(n * 4 // 3, hash)
+        m.put_many(pairs)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        def gets():
+            for key in keys:
+                m.get(key)
+
+        def contains():
+            for key in keys:
+                m.contains_key(key)
+
+        print(f"{name:<12}{used / n:>12.1f}{n / _time(gets):>12.0f}{n / _time(contains):>12.0f}")
+
+
+def _quadratic_probe_lengths(m) -> list:
+    """
+    Return the number of slots a successful lookup visits for every key of
+    a quadratic probing hash_map_oa map
+    """
+    lengths = []
+    for x in range(m.get_capacity()):
+        entry = m._buckets[x]
+        if entry is None or entry.is_tombstone is True:
+            continue
+        home = entry.hash % m.get_capacity()
+        count = 0
+        while (home + count ** 2) % m.get_capacity() != x:
+            count += 1
+        lengths.append(count + 1)
+    return lengths
+
+
+def bench_robin_hood(n: int = 100000) -> None:
+    """
+    Compare the quadratic probing map at its 0.5 load limit against Robin
+    Hood maps at 0.85 and 0.9: bytes per entry, successful lookup probe
+    lengths (mean, 99th percentile, max) and hit/miss lookups per second
+    """
+    keys = ['session-' + str(i) for i in range(n)]
+    missing = ['absent-' + str(i) for i in range(n)]
+    pairs = [(key, i) for i, key in enumerate(keys)]
+
+    print(f"\nRobin Hood vs quadratic probing, {n} keys")
+    print(f"{'map':<16}{'load':>6}{'bytes/entry':>12}{'mean':>6}{'p99':>5}{'max':>5}{'hits/s':>10}{'misses/s':>10}")
+    maps = (('quadratic', lambda: hash_map_oa.HashMap.with_expected_size(n, function=hash)),
+            ('robin hood .85', lambda: hash_map_rh.HashMap(int(n / 0.85) + 1, hash, 0.85)),
+            ('robin hood .90', lambda: hash_map_rh.HashMap(int(n / 0.9) + 1, hash, 0.9)))
+    for name, build in maps:
+        tracemalloc.start()
+        m = build()
+        m.put_many(pairs)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        if isinstance(m, hash_map_rh.HashMap):
+            lengths = m.probe_lengths()
+            lengths = sorted(lengths[i] for i in range(lengths.length()))
+        else:
+            lengths = sorted(_quadratic_probe_lengths(m))
+
+        def hits():
+            for key in keys:
+                m.get(key)
+
+        def misses():
+            for key in missing:
+                m.get(key)
+
+        print(f"{name:<16}{m.table_load():>6.2f}{used / n:>12.1f}{sum(lengths) / n:>6.2f}"
+              f"{lengths[int(n * 0.99)]:>5}{lengths[-1]:>5}{n / _time(hits):>10.0f}{n / _time(misses):>10.0f}")
+
+
+def bench_probing(n: int = 5000) -> None:
+    """
+    Compare the linear, quadratic and double hashing probe sequences of the
+    OA map: puts, hits and misses per second. hash_function_2 is the
+    primary hash and hash_function_1 the double hashing step
+    """
+    keys = ['session-' + str(i) for i in range(n)]
+    missing = ['absent-' + str(i) for i in range(n)]
+
+    print(f"\nOA probing strategies, {n} keys")
+    print(f"{'probing':<12}{'puts/s':>10}{'hits/s':>10}{'misses/s':>10}")
+    for probing in ('linear', 'quadratic', 'double'):
+        m = hash_map_oa.HashMap(11, hash_function_2, probing=probing, step_function=hash_function_1)
+
+        def puts():
+            for i, key in enumerate(keys):
+                m.put(key, i)
+
+        def hits():
+            for key in keys:
+                m.get(key)
+
+        def misses():
+            for key in missing:
+                m.get(key)
+
+        print(f"{probing:<12}{n / _time(puts):>10.0f}{n / _time(hits):>10.0f}{n / _time(misses):>10.0f}")
+
+
+def bench_hash_functions(n: int = 100000, capacity: int = 205759) -> None:
+    """
+    Compare the hash functions of a6_include on the key shapes the maps
+    see: keys sharing their full hash with an earlier key, keys landing in
+    an occupied bucket of a table of the given capacity, and ns per key
+    (best of 7 runs)
+    """
+    shapes = (('key + i', ['key' + str(i) for i in range(n)]),
+              ('session- + i', ['session-' + str(i) for i in range(n)]),
+              ('anagrams', [''.join(p) for p in itertools.islice(itertools.permutations('abcdefghijk'), n)]))
+    expected = n - capacity * (1 - (1 - 1 / capacity) ** n)
+
+    print(f"\nHash functions, {n} keys, capacity {capacity} (random hash: ~{expected:.0f} bucket collisions)")
+    print(f"{'keys':<14}{'function':<17}{'hash dups':>10}{'bucket dups':>12}{'ns/key':>8}")
+    for shape, keys in shapes:
+        for function in (hash_function_1, hash_function_2, fnv1a_hash, mix64_hash):
+            hashes = [function(key) for key in keys]
+            seconds = min(_time(lambda: [function(key) for key in keys]) for _ in range(7))
+            print(f"{shape:<14}{function.__name__:<17}{n - len(set(hashes)):>10}"
+                  f"{n - len({h % capacity for h in hashes}):>12}{seconds / n * 1e9:>8.0f}")
+
+
+class GlobalLockMap:
+    """
+    A hash_map_sc HashMap with every call wrapped in one lock, the way
+    maps were shared between threads before the striped map
+    """
+
+    def __init__(self, capacity: int = 11, function: callable = hash_function_1) -> None:
+        """Initialize the wrapped map and its lock."""
+        self._map = hash_map_sc.HashMap(capacity, function)
+        self._lock = threading.Lock()
+
+    def put(self, key: str, value: object) -> None:
+        """Add or update key under the lock."""
+        with self._lock:
+            self._map.put(key, value)
+
+    def get(self, key: str) -> object:
+        """Return the value of key under the lock."""
+        with self._lock:
+            return self._map.get(key)
+
+
+def bench_threads(operations: int = 80000, keys: int = 20000) -> None:
+    """
+    Compare the striped lock map of hash_map_sc_concurrent against one
+    global lock around hash_map_sc, at 1 to 16 threads sharing a fixed
+    number of operations (80% gets, 20% puts) on a preloaded map. Under
+    the GIL the threads take turns running Python code, so the striped map
+    shows less lock waiting rather than scaling with cores
+    """
+    names = ['session-' + str(i) for i in range(keys)]
+
+    print(f"\nThreads, {operations} operations over {keys} keys (ops/s)")
+    print(f"{'threads':<8}{'global lock':>12}{'striped':>12}")
+    for threads in (1, 2, 4, 8, 16):
+        rates = []
+        for cls in (GlobalLockMap, hash_map_sc_concurrent.HashMap):
+            m = cls(keys, hash)
+            for i, key in enumerate(names):
+                m.put(key, i)
+
+            def worker(number: int) -> None:
+                rng = random.Random(number)
+                for i in range(operations // threads):
+                    key = names[rng.randrange(keys)]
+                    if i % 5 == 0:
+                        m.put(key, i)
+                    else:
+                        m.get(key)
+
+            workers = [threading.Thread(target=worker, args=(number,)) for number in range(threads)]
+
+            def run():
+                for thread in workers:
+                    thread.start()
+                for thread in workers:
+                    thread.join()
+
+            rates.append(operations / _time(run))
+        print(f"{threads:<8}{rates[0]:>12.0f}{rates[1]:>12.0f}")
+
+
+def bench_find_mode(n: int = 200000, distinct: int = 20000) -> None:
+    """
+    Compare find_mode on a DynamicArray against find_mode_stream reading a
+    generator: seconds for n elements drawn from distinct keys
+    """
+    rng = random.Random(261)
+    data = [str(rng.randrange(distinct)) for _ in range(n)]
+    da = DynamicArray(data[:])
+
+    print(f"\nfind_mode, {n} elements over {distinct} keys (seconds)")
+    print(f"{'find_mode':>12}{'stream':>12}")
+    print(f"{_time(lambda: hash_map_sc.find_mode(da)):>12.2f}"
+          f"{_time(lambda: hash_map_sc.find_mode_stream(item for item in data)):>12.2f}")
+
+
+def bench_find_mode_parallel(n: int = 10000000, distinct: int = 100000) -> None:
+    """
+    Time find_mode_parallel at 1, 2, 4 and 8 processes on n elements drawn
+    from distinct keys, hashed with mix64_hash, and the speedup over one
+    process. Speedup is bounded by the cores available
+    """
+    rng = random.Random(261)
+    data = ['user-' + str(rng.randrange(distinct)) for _ in range(n)]
+
+    print(f"\nParallel find_mode, {n} elements over {distinct} keys")
+    print(f"{'processes':<10}{'seconds':>10}{'speedup':>10}")
+    single = None
+    for processes in (1, 2, 4, 8):
+        seconds = _time(lambda: hash_map_sc.find_mode_parallel(data, processes, mix64_hash))
+        single = single or seconds
+        print(f"{processes:<10}{seconds:>10.2f}{single / seconds:>10.2f}")
+
+
+def bench_snapshot(n: int = 1000000) -> None:
+    """
+    Compare save/load against pickle for both maps holding n entries
+    hashed with mix64_hash: seconds to write and read back, and file size
+    """
+    pairs = [('user-' + str(i), i) for i in range(n)]
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'map.bin')
+
+    print(f"\nSnapshots, {n} entries")
+    print(f"{'map':<6}{'format':<10}{'save s':>8}{'load s':>8}{'MB':>8}")
+    for name, module in (('SC', hash_map_sc), ('OA', hash_map_oa)):
+        m = module.HashMap.with_expected_size(n, function=mix64_hash)
+        m.put_many(pairs)
+
+        def pickle_save():
+            with open(path, 'wb') as file:
+                pickle.dump(m, file, pickle.HIGHEST_PROTOCOL)
+
+        def pickle_load():
+            with open(path, 'rb') as file:
+                pickle.load(file)
+
+        for format, save, load in (('save/load', lambda: m.save(path), lambda: module.HashMap.load(path)),
+                                   ('pickle', pickle_save, pickle_load)):
+            save_seconds = _time(save)
+            size = os.path.getsize(path)
+            print(f"{name:<6}{format:<10}{save_seconds:>8.2f}{_time(load):>8.2f}{size / 2 ** 20:>8.1f}")
+        os.remove(path)
+    os.rmdir(directory)
+
+
+# ------------------- WORKLOAD SUITE ---------------------------------------- #
+
+class DictMap:
+    """
+    The built in dict behind the HashMap method names, used as the
+    baseline of the workload suite
+    """
+
+    def __init__(self, capacity: int = 11, function: callable = None) -> None:
+        """Initialize an empty dict. The capacity and hash function are ignored."""
+        self._data = {}
+
+    def put(self, key: str, value: object) -> None:
+        """Add or update key."""
+        self._data[key] = value
+
+    def get(self, key: str) -> object:
+        """Return the value of key, or None if absent."""
+        return self._data.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """Return True if key is in the dict."""
+        return key in self._data
+
+    def remove(self, key: str) -> None:
+        """Remove key if present."""
+        self._data.pop(key, None)
+
+    def get_size(self) -> int:
+        """Return the number of keys."""
+        return len(self._data)
+
+
+# Maps compared by the suite, as name -> class
+SUITE_MAPS = {
+    'SC': hash_map_sc.HashMap,
+    'OA': hash_map_oa.HashMap,
+    'dict': DictMap,
+}
+
+# Hash functions the suite can be run with, as name -> function
+SUITE_HASH_FUNCTIONS = {
+    'builtin': hash,
+    'hash_function_1': hash_function_1,
+    'hash_function_2': hash_function_2,
+    'fnv1a_hash': fnv1a_hash,
+    'mix64_hash': mix64_hash,
+}
+
+
+def uniform_workload(n: int, rng: random.Random) -> list:
+    """
+    n distinct keys put in random order, then looked up in a different
+    order, checked for alongside n absent keys and half of them removed
+    """
+    keys = ['user-' + str(rng.getrandbits(48)) for _ in range(n)]
+    absent = ['absent-' + str(i) for i in range(n)]
+    lookups = keys[:]
+    rng.shuffle(lookups)
+    return [('put', keys), ('get', lookups), ('contains_key', lookups[:n // 2] + absent[:n // 2]),
+            ('remove', lookups[:n // 2])]
+
+
+def zipf_workload(n: int, rng: random.Random, exponent: float = 1.1) -> list:
+    """
+    n puts and n gets with keys drawn from a Zipf distribution over n / 10
+    keys, so a few hot keys are updated and read over and over
+    """
+    universe = ['item-' + str(i) for i in range(max(1, n // 10))]
+    weights = [1 / rank ** exponent for rank in range(1, len(universe) + 1)]
+    puts = rng.choices(universe, weights, k=n)
+    gets = rng.choices(universe, weights, k=n)
+    return [('put', puts), ('get', gets), ('contains_key', gets), ('remove', universe)]
+
+
+def delete_heavy_workload(n: int, rng: random.Random) -> list:
+    """
+    n keys put, three quarters of them removed and replaced by new keys
+    while the rest are read, leaving an OA table full of tombstones to
+    probe past and reuse
+    """
+    keys = ['order-' + str(i) for i in range(n)]
+    rng.shuffle(keys)
+    removed = keys[:3 * n // 4]
+    kept = keys[3 * n // 4:]
+    replacements = ['order-' + str(i) for i in range(n, n + len(removed))]
+    return [('put', keys), ('remove', removed), ('put', replacements), ('get', kept + removed),
+            ('contains_key', kept + removed), ('remove', kept + replacements)]
+
+
+def adversarial_workload(n: int, rng: random.Random) -> list:
+    """
+    n anagrams of one string. hash_function_1 adds up the characters, so
+    under it every key has the same hash and lands in the same chain or
+    probe sequence
+    """
+    keys = [''.join(letters) for letters in itertools.islice(itertools.permutations('abcdefghijk'), n)]
+    rng.shuffle(keys)
+    return [('put', keys), ('get', keys), ('contains_key', keys), ('remove', keys)]
+
+
+# Workloads of the suite, as name -> function(n, rng) returning a list of (operation, keys) phases
+WORKLOADS = {
+    'uniform': uniform_workload,
+    'zipf': zipf_workload,
+    'delete_heavy': delete_heavy_workload,
+    'adversarial': adversarial_workload,
+}
+
+
+def _percentile(ordered: list, fraction: float) -> int:
+    """Return the value at the given fraction of a sorted list."""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _run_phases(m, phases: list) -> dict:
+    """
+    Run every phase on m, timing each operation on its own. Return the
+    latencies in nanoseconds of each operation, as operation -> list
+    """
+    clock = time.perf_counter_ns
+    latencies = {}
+    for operation, keys in phases:
+        method = getattr(m, operation)
+        timings = latencies.setdefault(operation, [])
+        if operation == 'put':
+            for i, key in enumerate(keys):
+                start = clock()
+                method(key, i)
+                timings.append(clock() - start)
+        else:
+            for key in keys:
+                start = clock()
+                method(key)
+                timings.append(clock() - start)
+    return latencies
+
+
+def _bytes_per_entry(cls, function: callable, keys: list) -> float:
+    """
+    Return the bytes allocated per distinct key by building a map of the
+    given class from the keys
+    """
+    tracemalloc.start()
+    m = cls(11, function)
+    for i, key in enumerate(keys):
+        m.put(key, i)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return used / max(1, m.get_size())
+
+
+def _resize_seconds(cls, function: callable, keys: list) -> float:
+    """
+    Return the seconds taken by resize_table to double a map of the given
+    class holding the keys, or None for maps without resize_table
+    """
+    m = cls(11, function)
+    if not hasattr(m, 'resize_table'):
+        return None
+    for i, key in enumerate(keys):
+        m.put(key, i)
+    return _time(lambda: m.resize_table(m.get_capacity() * 2))
+
+
+def run_suite(n: int = 20000, function_name: str = 'builtin', workloads: list = None,
+              maps: list = None, seed: int = 261) -> list:
+    """
+    Run every workload against every map and return one result dict for
+    each (workload, map, operation) with its throughput and latency
+    percentiles, plus one 'memory' and one 'resize_table' result for each
+    (workload, map). The adversarial workload always uses hash_function_1,
+    since the collisions it makes are specific to it, and is capped at
+    2000 keys as every operation on it walks the whole chain
+    """
+    results = []
+    for workload in workloads or list(WORKLOADS):
+        size = min(n, 2000) if workload == 'adversarial' else n
+        name = 'hash_function_1' if workload == 'adversarial' else function_name
+        function = SUITE_HASH_FUNCTIONS[name]
+        phases = WORKLOADS[workload](size, random.Random(seed))
+        first_puts = next(keys for operation, keys in phases if operation == 'put')
+
+        for map_name in maps or list(SUITE_MAPS):
+            cls = SUITE_MAPS[map_name]
+            common = {'workload': workload, 'map': map_name, 'hash_function': name, 'n': size}
+
+            latencies = _run_phases(cls(11, function), phases)
+            for operation, timings in latencies.items():
+                timings.sort()
+                total = sum(timings)
+                results.append(dict(common, operation=operation, ops=len(timings),
+                                    ops_per_sec=len(timings) / (total / 1e9) if total else None,
+                                    p50_ns=_percentile(timings, 0.50), p90_ns=_percentile(timings, 0.90),
+                                    p99_ns=_percentile(timings, 0.99), max_ns=timings[-1]))
+
+            results.append(dict(common, operation='memory',
+                                bytes_per_entry=_bytes_per_entry(cls, function, first_puts)))
+            results.append(dict(common, operation='resize_table',
+                                seconds=_resize_seconds(cls, function, first_puts)))
+    return results
+
+
+def print_suite(results: list) -> None:
+    """Print the results of run_suite as one table per workload."""
+    for workload in dict.fromkeys(result['workload'] for result in results):
+        rows = [result for result in results if result['workload'] == workload]
+        print(f"\n{workload}, {rows[0]['n']} keys, {rows[0]['hash_function']}")
+        print(f"{'map':<6}{'operation':<14}{'ops/s':>12}{'p50 ns':>9}{'p90 ns':>9}{'p99 ns':>9}{'max ns':>10}")
+        for row in rows:
+            if row['operation'] == 'memory':
+                print(f"{row['map']:<6}{'memory':<14}{row['bytes_per_entry']:>12.1f} bytes/entry")
+            elif row['operation'] == 'resize_table':
+                if row['seconds'] is not None:
+                    print(f"{row['map']:<6}{'resize_table':<14}{row['seconds'] * 1e3:>12.2f} ms")
+            else:
+                print(f"{row['map']:<6}{row['operation']:<14}{row['ops_per_sec'] or 0:>12.0f}{row['p50_ns']:>9}"
+                      f"{row['p90_ns']:>9}{row['p99_ns']:>9}{row['max_ns']:>10}")
+
+
+def main(argv: list = None) -> None:
+    """
+    Run the map comparisons, or the workload suite with the suite command.
+    With --json, the suite results are also written to a file along with
+    the settings and Python version they were taken with
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the SC and OA HashMaps')
+    parser.add_argument('command', nargs='?', choices=('compare', 'suite'), default='compare')
+    parser.add_argument('--n', type=int, default=20000, help='keys per workload')
+    parser.add_argument('--hash', choices=list(SUITE_HASH_FUNCTIONS), default='builtin')
+    parser.add_argument('--workload', action='append', choices=list(WORKLOADS))
+    parser.add_argument('--map', action='append', choices=list(SUITE_MAPS))
+    parser.add_argument('--seed', type=int, default=261)
+    parser.add_argument('--json', metavar='PATH', help='write the suite results to PATH')
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        bench_batch()
+        bench_storage()
+        bench_chaining()
+        bench_robin_hood()
+        bench_probing()
+        bench_hash_functions()
+        bench_threads()
+        bench_find_mode()
+        bench_find_mode_parallel()
+        bench_snapshot()
+        return
+
+    results = run_suite(args.n, args.hash, args.workload, args.map, args.seed)
+    print_suite(results)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'python': platform.python_version(), 'n': args.n, 'hash_function': args.hash,
+                       'seed': args.seed, 'results': results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
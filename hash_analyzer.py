@@ -0,0 +1,206 @@
+# Course:      CS261 - Data Structures
+# Assignment:  6
+# Description: Predict how a sample of keys will spread over a HashMap
+#              before deploying it. For each hash function and capacity,
+#              reports bucket occupancy, chi-square against a uniform
+#              spread, the longest separate chaining (SC) chain and the
+#              expected and longest probe under the open addressing (OA)
+#              map's quadratic probing, then recommends the function and
+#              capacity with the lowest predicted lookup cost.
+#              Run with: python hash_analyzer.py keys.txt
+
+
+import argparse
+import importlib
+import json
+
+from a6_include import (fnv1a_hash, growth_prime_at_least, hash_function_1,
+                        hash_function_2, hash_many, mix64_hash, next_prime)
+
+
+# Hash functions that can be named on the command line, as name -> function
+HASH_FUNCTIONS = {
+    'hash_function_1': hash_function_1,
+    'hash_function_2': hash_function_2,
+    'fnv1a_hash': fnv1a_hash,
+    'mix64_hash': mix64_hash,
+}
+
+
+def load_keys(path: str) -> list:
+    """
+    Return the keys of a file holding one key per line. Blank lines are
+    skipped and repeated keys are kept once, as a map would store them
+    """
+    with open(path, encoding='utf-8') as file:
+        return list(dict.fromkeys(line.rstrip('\r\n') for line in file if line.strip()))
+
+
+def resolve_function(name: str) -> callable:
+    """
+    Return the hash function for a name: one of HASH_FUNCTIONS, or a
+    custom function given as module:function
+    """
+    if name in HASH_FUNCTIONS:
+        return HASH_FUNCTIONS[name]
+    if ':' not in name:
+        raise ValueError(f"Unknown hash function: {name}")
+    module, attribute = name.split(':', 1)
+    return getattr(importlib.import_module(module), attribute)
+
+
+def _quadratic_probe_lengths(hashes: list, capacity: int) -> list:
+    """
+    Insert the hashes one by one into an empty table of the given capacity
+    with the OA map's quadratic probing, and return the number of slots a
+    successful lookup of each one visits. Return None if some key finds no
+    free slot, which can happen once the load passes 0.5
+    """
+    taken = bytearray(capacity)
+    lengths = []
+    for key_hash in hashes:
+        index = key_hash % capacity
+        step = 1
+        count = 1
+        while taken[index]:
+            if count == capacity:
+                return None
+            index = (index + step) % capacity
+            step += 2
+            count += 1
+        taken[index] = 1
+        lengths.append(count)
+    return lengths
+
+
+def analyze(keys: list, function: callable, capacity: int) -> dict:
+    """
+    Return the spread of the keys over a table of the given capacity.
+    Lookup costs are in key comparisons for SC (half a chain on average)
+    and slots visited for OA. The OA figures are None when the keys would
+    not fit at this capacity
+    """
+    capacity = next_prime(capacity)
+    hashes = hash_many(function, keys)
+    n = len(hashes)
+
+    chains = [0] * capacity
+    for key_hash in hashes:
+        chains[key_hash % capacity] += 1
+
+    expected = n / capacity
+    chi_square = sum((chain - expected) ** 2 for chain in chains) / expected if n else 0.0
+    probes = _quadratic_probe_lengths(hashes, capacity)
+
+    return {
+        'function': getattr(function, '__name__', str(function)),
+        'capacity': capacity,
+        'keys': n,
+        'load': expected,
+        'distinct_hashes': len(set(hashes)),
+        'occupied_buckets': capacity - chains.count(0),
+        'empty_buckets': chains.count(0),
+        # Close to 1.0 for a uniform spread, much larger when keys pile up
+        'chi_square_per_bucket': chi_square / max(capacity - 1, 1),
+        'chi_square': chi_square,
+        'sc_max_chain': max(chains),
+        # A successful search of a chain of length c compares (c + 1) / 2 keys on average
+        'sc_expected_cost': sum(chain * (chain + 1) / 2 for chain in chains) / n if n else 0.0,
+        'oa_expected_probe': (sum(probes) / n if n else 0.0) if probes is not None else None,
+        'oa_max_probe': max(probes, default=0) if probes is not None else None,
+    }
+
+
+def default_capacities(n: int) -> list:
+    """
+    Return the capacities tried when none are given: the first three
+    growth ladder primes a map holding n keys could sit at, from a load of
+    1.0 (the SC limit) down past 0.5 (the OA limit)
+    """
+    first = growth_prime_at_least(max(n, 2))
+    if first is None:
+        return [next_prime(n)]
+    capacities = [first]
+    while len(capacities) < 3:
+        following = growth_prime_at_least(capacities[-1] + 1)
+        if following is None:
+            break
+        capacities.append(following)
+    return capacities
+
+
+def _cheapest(results: list, cost: str, tolerance: float) -> dict:
+    """
+    Return the result with the smallest capacity among those whose cost is
+    within tolerance of the lowest, breaking ties by cost
+    """
+    lowest = min(result[cost] for result in results)
+    close = [result for result in results if result[cost] <= lowest * (1 + tolerance)]
+    return min(close, key=lambda result: (result['capacity'], result[cost]))
+
+
+def recommend(results: list, tolerance: float = 0.1) -> dict:
+    """
+    Return the result with the best predicted lookup cost for each map
+    type, as 'sc' and 'oa'. A bigger table always shortens lookups a
+    little, so costs within tolerance of the lowest count as equal and the
+    smaller capacity wins. OA results at or above the map's 0.5 load limit
+    are skipped, since it would grow first
+    """
+    sc = [result for result in results if result['load'] <= 1.0] or results
+    oa = [result for result in results if result['load'] < 0.5 and result['oa_expected_probe'] is not None]
+    best = {'sc': _cheapest(sc, 'sc_expected_cost', tolerance)}
+    if oa:
+        best['oa'] = _cheapest(oa, 'oa_expected_probe', tolerance)
+    return best
+
+
+def print_report(results: list, best: dict) -> None:
+    """Print one line per analyzed function and capacity, then the recommendations."""
+    print(f"{'function':<17}{'capacity':>10}{'load':>6}{'occupied':>10}{'chi2/bucket':>12}"
+          f"{'SC max':>8}{'SC cost':>8}{'OA mean':>8}{'OA max':>8}")
+    for result in results:
+        oa_mean = '-' if result['oa_expected_probe'] is None else f"{result['oa_expected_probe']:.2f}"
+        oa_max = '-' if result['oa_max_probe'] is None else str(result['oa_max_probe'])
+        print(f"{result['function']:<17}{result['capacity']:>10}{result['load']:>6.2f}"
+              f"{result['occupied_buckets']:>10}{result['chi_square_per_bucket']:>12.2f}"
+              f"{result['sc_max_chain']:>8}{result['sc_expected_cost']:>8.2f}{oa_mean:>8}{oa_max:>8}")
+
+    print()
+    for kind, label, cost in (('sc', 'SC', 'sc_expected_cost'), ('oa', 'OA', 'oa_expected_probe')):
+        if kind in best:
+            print(f"{label}: {best[kind]['function']} at capacity {best[kind]['capacity']}"
+                  f" (expected cost {best[kind][cost]:.2f})")
+        else:
+            print(f"{label}: no capacity tried keeps the load below 0.5")
+
+
+def main(argv: list = None) -> None:
+    """
+    Analyze a key file under every requested hash function and capacity
+    and print the report, or write it as JSON with --json
+    """
+    parser = argparse.ArgumentParser(description='Predict how keys spread over a HashMap')
+    parser.add_argument('keys', help='file with one key per line')
+    parser.add_argument('--function', action='append',
+                        help='hash function name or module:function (default: all built in)')
+    parser.add_argument('--capacity', action='append', type=int,
+                        help='capacity to try, rounded up to a prime (default: growth ladder)')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args(argv)
+
+    keys = load_keys(args.keys)
+    functions = [resolve_function(name) for name in args.function or HASH_FUNCTIONS]
+    capacities = args.capacity or default_capacities(len(keys))
+
+    results = [analyze(keys, function, capacity) for function in functions for capacity in capacities]
+    best = recommend(results)
+    if args.json:
+        print(json.dumps({'results': results, 'recommended': best}, indent=2))
+    else:
+        print(f"{len(keys)} keys from {args.keys}\n")
+        print_report(results, best)
+
+
+if __name__ == "__main__":
+    main()
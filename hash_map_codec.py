@@ -0,0 +1,202 @@
+# Course:      CS261 - Data Structures
+# Assignment:  6
+# Description: Compact binary encoding of HashMap keys and values, shared by
+#              the on-disk map formats. Keys are stored as UTF-8. A value is
+#              one tag byte followed by its payload: None, bools, ints,
+#              floats, strings and bytes have their own tags, and anything
+#              else is pickled. Records are prefixed with their length as
+#              a 4 byte little endian unsigned int.
+#              Also holds the snapshot format written by the maps' save
+#              methods and read back by their load methods.
+#              Decoding a pickled value can run code, so only read files
+#              from a trusted source.
+
+import pickle
+import struct
+
+from a6_include import fnv1a_hash, hash_function_1, hash_function_2, mix64_hash
+
+# Value tags
+_NONE = b'N'
+_TRUE = b'T'
+_FALSE = b'F'
+_INT64 = b'i'
+_BIG_INT = b'I'
+_FLOAT = b'd'
+_STR = b's'
+_BYTES = b'b'
+_PICKLE = b'p'
+
+# The same tags as ints, as decode_value compares them
+_NONE_TAG, _TRUE_TAG, _FALSE_TAG, _INT64_TAG, _BIG_INT_TAG, _FLOAT_TAG, _STR_TAG, _BYTES_TAG, _PICKLE_TAG = \
+    b''.join((_NONE, _TRUE, _FALSE, _INT64, _BIG_INT, _FLOAT, _STR, _BYTES, _PICKLE))
+
+_INT64_FORMAT = struct.Struct('<q')
+_FLOAT_FORMAT = struct.Struct('<d')
+RECORD_LENGTH = struct.Struct('<I')
+
+
+def encode_key(key: str) -> bytes:
+    """Return the stored form of a key. Keys must be strings."""
+    if type(key) is not str:
+        raise TypeError(f"Only str keys can be stored, not {type(key).__name__}")
+    return key.encode('utf-8', 'surrogatepass')
+
+
+def decode_key(data) -> str:
+    """Return the key stored as the given bytes or memoryview."""
+    return str(data, 'utf-8', 'surrogatepass')
+
+
+def encode_value(value: object) -> bytes:
+    """Return the stored form of a value, a tag byte followed by its payload."""
+    kind = type(value)
+    if value is None:
+        return _NONE
+    if kind is bool:
+        return _TRUE if value else _FALSE
+    if kind is int:
+        if -2 ** 63 <= value < 2 ** 63:
+            return _INT64 + _INT64_FORMAT.pack(value)
+        return _BIG_INT + value.to_bytes(value.bit_length() // 8 + 1, 'little', signed=True)
+    if kind is float:
+        return _FLOAT + _FLOAT_FORMAT.pack(value)
+    if kind is str:
+        return _STR + value.encode('utf-8', 'surrogatepass')
+    if kind is bytes:
+        return _BYTES + value
+    return _PICKLE + pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def decode_value(data) -> object:
+    """Return the value stored as the given bytes or memoryview."""
+    # Indexing bytes or a memoryview gives the tag as an int, which is cheaper to compare than a slice
+    tag = data[0]
+    if tag == _INT64_TAG:
+        return _INT64_FORMAT.unpack_from(data, 1)[0]
+    if tag == _STR_TAG:
+        return str(data[1:], 'utf-8', 'surrogatepass')
+    if tag == _NONE_TAG:
+        return None
+    if tag == _TRUE_TAG:
+        return True
+    if tag == _FALSE_TAG:
+        return False
+    if tag == _BIG_INT_TAG:
+        return int.from_bytes(data[1:], 'little', signed=True)
+    if tag == _FLOAT_TAG:
+        return _FLOAT_FORMAT.unpack_from(data, 1)[0]
+    if tag == _BYTES_TAG:
+        return bytes(data[1:])
+    if tag == _PICKLE_TAG:
+        return pickle.loads(data[1:])
+    raise ValueError(f"Unknown value tag: {bytes([tag])!r}")
+
+
+def pack_record(data: bytes) -> bytes:
+    """Return data prefixed with its length."""
+    return RECORD_LENGTH.pack(len(data)) + data
+
+
+def read_record(buffer, offset: int) -> tuple:
+    """
+    Return the record starting at offset of a bytes-like buffer, as a
+    memoryview that does not copy it, and the offset just past it
+    """
+    length = RECORD_LENGTH.unpack_from(buffer, offset)[0]
+    start = offset + RECORD_LENGTH.size
+    return memoryview(buffer)[start:start + length], start + length
+
+
+# ------------------- SNAPSHOTS -------------------------------------------- #
+
+SNAPSHOT_MAGIC = b'A6MAPSNP'
+SNAPSHOT_VERSION = 2
+
+# magic, version, flags, capacity, size, hash function name
+_SNAPSHOT_HEADER = struct.Struct('<8sIIQQ64s')
+# full hash of the key, key length, value length
+_SNAPSHOT_ENTRY = struct.Struct('<QII')
+
+# Header flag set when every hash fit in the unsigned 64 bit entry field, so load can skip hashing the keys
+_HASHES_STORED = 1
+
+# Bytes gathered in memory before each write to the file
+_WRITE_CHUNK = 1 << 20
+
+# Hash functions a snapshot can name, so load can find the one it was saved with
+SNAPSHOT_HASH_FUNCTIONS = {
+    function.__name__: function for function in (hash_function_1, hash_function_2, fnv1a_hash, mix64_hash)
+}
+
+
+def write_snapshot(path: str, capacity: int, size: int, function: callable, entries) -> None:
+    """
+    Write a snapshot of a map to path: its capacity, size and hash function
+    name, then a table with the fixed width header of each (hash, key,
+    value) of entries, then the key and value bytes of every entry back to
+    back. The table comes before the bytes so load can decode it in one
+    go. entries must hold exactly size entries. The bytes are gathered into
+    large chunks so the file gets a few big writes
+    """
+    name = getattr(function, '__name__', '').encode('utf-8')[:64]
+    flags = _HASHES_STORED
+    table = bytearray(_SNAPSHOT_ENTRY.size * size)
+    chunk = bytearray()
+    count = 0
+    with open(path, 'wb') as file:
+        # The header and table are written last, once every entry has been seen
+        file.seek(_SNAPSHOT_HEADER.size + len(table))
+        for key_hash, key, value in entries:
+            if not 0 <= key_hash < 2 ** 64:
+                flags = 0
+                key_hash = 0
+            key_data = encode_key(key)
+            value_data = encode_value(value)
+            _SNAPSHOT_ENTRY.pack_into(table, count * _SNAPSHOT_ENTRY.size, key_hash, len(key_data), len(value_data))
+            count += 1
+            chunk += key_data
+            chunk += value_data
+            if len(chunk) >= _WRITE_CHUNK:
+                file.write(chunk)
+                chunk = bytearray()
+        if count != size:
+            raise ValueError(f"Snapshot of {size} entries was given {count}")
+        file.write(chunk)
+        file.seek(0)
+        file.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, flags, capacity, size, name))
+        file.write(table)
+
+
+def read_snapshot(path: str, function: callable = None) -> tuple:
+    """
+    Read a snapshot written by write_snapshot in one go. Return its capacity, its size, the hash function
+    (the given one, or else the one named in the file) and a generator of its (hash, key, value) entries
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    magic, version, flags, capacity, size, name = _SNAPSHOT_HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} HashMap snapshot")
+
+    name = name.rstrip(b'\x00').decode('utf-8')
+    if function is None:
+        if name not in SNAPSHOT_HASH_FUNCTIONS:
+            raise ValueError(f"{path} was saved with hash function {name}, which must be passed to load")
+        function = SNAPSHOT_HASH_FUNCTIONS[name]
+    # Stored hashes are only trusted from the named function itself. Another function with the same name, or
+    # the built in hash with its per process seed, would put keys in different buckets
+    hashes_stored = flags & _HASHES_STORED and SNAPSHOT_HASH_FUNCTIONS.get(name) is function
+
+    def entries():
+        view = memoryview(data)
+        offset = _SNAPSHOT_HEADER.size + _SNAPSHOT_ENTRY.size * size
+        for key_hash, key_length, value_length in _SNAPSHOT_ENTRY.iter_unpack(view[_SNAPSHOT_HEADER.size:offset]):
+            key = decode_key(view[offset:offset + key_length])
+            offset += key_length
+            value = decode_value(view[offset:offset + value_length])
+            offset += value_length
+            yield (key_hash if hashes_stored else function(key)), key, value
+
+    return capacity, size, function, entries()
@@ -0,0 +1,225 @@
+# Course:      CS261 - Data Structures
+# Assignment:  6
+# Description: Copy-on-write hashmap for read-mostly data. Readers use the
+#              current snapshot, an immutable map that is never changed
+#              once published, so get and contains_key take no lock.
+#              Writers build a new map off to the side and publish it by
+#              swapping one reference, which is atomic. Every write copies
+#              the whole map with its copy method, which reuses the cached
+#              hashes, so bulk changes should go through put_many and
+#              remove_many. Built on the HashMap in hash_map_sc.py by
+#              default, or the one in hash_map_oa.py.
+
+import threading
+
+import hash_map_sc
+from a6_include import DynamicArray, as_list, hash_function_1, hash_function_2
+
+
+class Snapshot:
+    """
+    Immutable point-in-time view of a copy-on-write HashMap. Later writes
+    to the map publish a new snapshot and never touch this one
+    """
+
+    def __init__(self, map) -> None:
+        """Initialize the view from a map that will not be changed again."""
+        self._map = map
+
+    def get(self, key: str) -> object:
+        """Return the value for key, or None if not found."""
+        return self._map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """Return True if key is in the snapshot."""
+        return self._map.contains_key(key)
+
+    def get_size(self) -> int:
+        """Return the number of keys in the snapshot."""
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """Return the capacity of the snapshot's table."""
+        return self._map.get_capacity()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """Return a new dynamic array with the (key, value) pairs of the snapshot."""
+        return self._map.get_keys_and_values()
+
+    def __iter__(self):
+        """Iterate through the (key, value) pairs of the snapshot. Every call gets its own iterator."""
+        return iter(self._map.items())
+
+
+class HashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 map_class: type = hash_map_sc.HashMap) -> None:
+        """
+        Initialize new copy-on-write HashMap. Each snapshot is a
+        map_class map, which must take capacity and hash function
+        as its first two arguments and have copy and items methods
+        """
+        self._map_class = map_class
+        self._hash_function = function
+        self._write_lock = threading.Lock()
+        self._snapshot = Snapshot(map_class(capacity, function))
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        return str(self._snapshot._map)
+
+    def snapshot(self) -> Snapshot:
+        """
+        Method to return the current snapshot. It stays the same however long it is used, so it is the way to
+        iterate or make several lookups that must agree with each other while writers carry on
+        """
+        return self._snapshot
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._snapshot.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._snapshot.get_capacity()
+
+    # ------------------------------------------------------------------ #
+
+    def _write(self, change: callable) -> None:
+        """
+        Method to apply change to a copy of the current map and publish the copy. Writers take turns, readers are
+        never blocked and keep using the old snapshot until the new one is published
+        """
+        with self._write_lock:
+            copy = self._snapshot._map.copy()
+            change(copy)
+            # Only this assignment is seen by readers, and a reference swap is atomic
+            self._snapshot = Snapshot(copy)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Method to add key/value to the hash map, or update it if the key is already present
+        """
+        self._write(lambda copy: copy.put(key, value))
+
+    def put_many(self, pairs) -> None:
+        """
+        Method to add a batch of (key, value) pairs, given as a DynamicArray or any iterable, with one copy of
+        the map
+        """
+        pairs = as_list(pairs)
+        self._write(lambda copy: copy.put_many(pairs))
+
+    def get(self, key: str) -> object:
+        """
+        Method to return a value for the given key, or None if not found. Takes no lock
+        """
+        return self._snapshot.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Method to determine if given key is in the hash map. Takes no lock
+        """
+        return self._snapshot.contains_key(key)
+
+    def remove(self, key: str) -> None:
+        """
+        Method to remove a given key from the hash map
+        """
+        if self._snapshot.contains_key(key):
+            self._write(lambda copy: copy.remove(key))
+
+    def remove_many(self, keys) -> None:
+        """
+        Method to remove a batch of keys, given as a DynamicArray or any iterable, with one copy of the map
+        """
+        keys = as_list(keys)
+        self._write(lambda copy: copy.remove_many(keys))
+
+    def clear(self) -> None:
+        """
+        Method to clear the hash map without changing capacity
+        """
+        with self._write_lock:
+            capacity = self._snapshot.get_capacity()
+            self._snapshot = Snapshot(self._map_class(capacity, self._hash_function))
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Method to resize the hash table based on new capacity given
+        """
+        self._write(lambda copy: copy.resize_table(new_capacity))
+
+    def table_load(self) -> float:
+        """
+        Method to return the load factor of the table
+        """
+        return self._snapshot._map.table_load()
+
+    def empty_buckets(self) -> int:
+        """
+        Method to return the amount of empty buckets
+        """
+        return self._snapshot._map.empty_buckets()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Method to return a dynamic array with tuple of key/value pairs
+        """
+        return self._snapshot.get_keys_and_values()
+
+    def __iter__(self):
+        """
+        Method to iterate through the (key, value) pairs of the current snapshot
+        """
+        return iter(self._snapshot)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput / get / remove")
+    print("------------------")
+    m = HashMap(11, hash_function_2)
+    m.put_many(('key' + str(i), i * 10) for i in range(25))
+    print(m.empty_buckets(), m.get_size(), m.get_capacity(), m.get('key7'), m.contains_key('key30'))
+    m.remove('key7')
+    print(m.empty_buckets(), m.get_size(), m.get('key7'), m.contains_key('key7'))
+
+    print("\nsnapshot")
+    print("--------")
+    view = m.snapshot()
+    m.put('key0', -1)
+    m.remove_many(['key1', 'key2'])
+    print(view.get('key0'), view.get_size(), m.get('key0'), m.get_size())
+
+    print("\nreaders during writes")
+    print("---------------------")
+    # Every published snapshot holds key0 .. keyN with value i * 10, so readers must always see whole batches
+    m = HashMap(11, hash_function_2)
+    failures = []
+
+    def reader() -> None:
+        for _ in range(2000):
+            view = m.snapshot()
+            size = view.get_size()
+            if any(view.get('key' + str(i)) != i * 10 for i in range(size)):
+                failures.append(size)
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for batch in range(20):
+        m.put_many(('key' + str(i), i * 10) for i in range(batch * 10, batch * 10 + 10))
+    for thread in readers:
+        thread.join()
+    print(m.get_size(), 'keys,', len(failures), 'inconsistent snapshots')
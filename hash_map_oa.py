@@ -5,16 +5,42 @@
 # Due Date: 6/9/2023
 # Description: Implement open addressing hashmap with supporting methods
 
-from a6_include import (DynamicArray, DynamicArrayException, HashEntry,
+import time
+
+from a6_include import (DynamicArray, HashEntry, as_list, hash_many,
+                        batch_capacity, check_min_load, new_key_count, fitted_capacity, grown_capacity,
+                        expected_capacity, shrunk_capacity,
                         hash_function_1, hash_function_2)
+from hash_map_codec import read_snapshot, write_snapshot
+from hash_map_stats import HashMapStats
+from hash_map_views import HashMapIterator, ItemsView, KeysView, ValuesView
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self, capacity: int, function,
+                 max_tombstone_ratio: float = 0.25,
+                 min_load: float = 0.0,
+                 incremental_step: int = 0,
+                 probing: str = 'quadratic',
+                 step_function: callable = None,
+                 stats: bool = False) -> None:
         """
         Initialize new HashMap that uses
-        quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        open addressing for collision resolution. probing picks the probe
+        sequence: 'linear', 'quadratic' (the default) or 'double' hashing.
+        Double hashing steps by step_function, which defaults to
+        hash_function_2, or hash_function_1 when that is already the
+        primary hash function.
+        Once tombstones take up max_tombstone_ratio of the buckets,
+        the table is rehashed in place to clear them.
+        When min_load is above 0, remove and clear shrink the table once
+        the load drops below it, never going under the starting capacity.
+        min_load must be below 0.125, a quarter of the 0.5 load limit.
+        When incremental_step is above 0, growing the table does not move
+        any entries. Each later operation moves incremental_step buckets
+        of the old table over, and lookups check both tables until it is
+        done.
+        With stats set, the map keeps the counters returned by get_stats
         """
         self._buckets = DynamicArray()
 
@@ -25,6 +51,29 @@ class HashMap:
 
         self._hash_function = function
         self._size = 0
+        self._tombstones = 0
+        self._max_tombstone_ratio = max_tombstone_ratio
+        self._min_capacity = self._capacity
+        check_min_load(min_load, 0.5)
+        self._min_load = min_load
+
+        if probing not in ('linear', 'quadratic', 'double'):
+            raise ValueError(f"Unknown probing strategy: {probing}")
+        self._probing = probing
+        if step_function is None:
+            step_function = hash_function_1 if function is hash_function_2 else hash_function_2
+        self._step_function = step_function
+
+        # Old table and the next bucket to move while an incremental rehash is running
+        self._incremental_step = incremental_step
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+
+        self._stats = HashMapStats() if stats else None
+
+        # Counts changes to which keys are held or where they sit, so iterators can tell the map changed
+        self._version = 0
 
     def __str__(self) -> str:
         """
@@ -69,6 +118,16 @@ class HashMap:
 
         return True
 
+    @classmethod
+    def with_expected_size(cls, n: int, max_load: float = 0.5,
+                           function: callable = hash_function_1, **options) -> "HashMap":
+        """
+        Method to build a map sized for n keys, so putting them never grows the table. The capacity is the first
+        growth ladder prime of at least n / max_load (max_load is capped at the 0.5 grow limit). Other options
+        are passed on to the constructor
+        """
+        return cls(expected_capacity(n, min(max_load, 0.5)), function, **options)
+
     def get_size(self) -> int:
         """
         Return size of map
@@ -89,38 +148,303 @@ class HashMap:
         """
         Method to update key/value pairs in hash map. Use open addressing to find correct location
         """
+        self._make_room()
+        self._insert(key, value, self._hash_function(key))
+
+    def _make_room(self) -> None:
+        """
+        Method to run before anything that may add a key. Moves an incremental rehash along and grows the table
+        if it is at the 0.5 load limit
+        """
+        self._step()
         # Resize if needed
         if self.table_load() >= 0.5:
-            self.resize_table(self._capacity*2)
-        # Set hash value and set additional for using quad probe. Set count for quad probe as well
-        hash = self._hash_function(key) % self._capacity
-        oa_key = hash
+            self._grow()
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Method to return the value of key, first adding it with default if it is not in the hash map
+        """
+        self._make_room()
+        entry, added = self._find_or_add(key, self._hash_function(key), default)
+        return entry.value
+
+    def get_or_insert(self, key: str, factory: callable) -> object:
+        """
+        Method to return the value of key. If it is not in the hash map, it is added with the value returned by
+        factory(), which is only called in that case
+        """
+        self._make_room()
+        key_hash = self._hash_function(key)
+        entry, slot, step_hash = self._find_slot(key, key_hash)
+        if entry is not None:
+            return entry.value
+
+        # Call factory before adding the key, so a factory that raises leaves the hash map as it was
+        version = self._version
+        value = factory()
+        if self._version == version:
+            return self._add_at(slot, key, key_hash, step_hash, value).value
+        # factory changed the map, so the key may be in it now or the slot may be stale
+        entry, added = self._find_or_add(key, key_hash, value)
+        return entry.value
+
+    def update_with(self, key: str, fn: callable, default: object = None) -> object:
+        """
+        Method to replace the value of key with fn(value), using fn(default) if the key is not in the hash map.
+        Return the new value
+        """
+        self._make_room()
+        key_hash = self._hash_function(key)
+        entry, slot, step_hash = self._find_slot(key, key_hash)
+        if entry is not None:
+            entry.value = fn(entry.value)
+            return entry.value
+
+        # Call fn before adding the key, so an fn that raises leaves the hash map as it was
+        version = self._version
+        value = fn(default)
+        if self._version == version:
+            return self._add_at(slot, key, key_hash, step_hash, value).value
+        # fn changed the map, so the key may be in it now or the slot may be stale
+        entry, added = self._find_or_add(key, key_hash, value)
+        if added is False:
+            entry.value = value
+        return entry.value
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Method to add delta to the value of key, starting from 0 if the key is not in the hash map. Return the
+        new value
+        """
+        # Work out the starting value first, so a delta that cannot be added leaves the hash map as it was
+        value = 0 + delta
+        self._make_room()
+        entry, added = self._find_or_add(key, self._hash_function(key), value)
+        if added is False:
+            entry.value += delta
+        return entry.value
+
+    def _insert(self, key: str, value: object, key_hash: int) -> None:
+        """
+        Method to add or update key/value using an already computed hash of the key. Does not check the load
+        """
+        entry, added = self._find_or_add(key, key_hash, value)
+        if added is False:
+            # Key present, only need to replace the value
+            entry.value = value
+
+    def _find_or_add(self, key: str, key_hash: int, default: object) -> tuple:
+        """
+        Method to return the live entry for key and False, or if the key is absent, place a new entry holding
+        default and return it and True. Does not check the load
+        """
+        entry, slot, step_hash = self._find_slot(key, key_hash)
+        if entry is not None:
+            return entry, False
+        return self._add_at(slot, key, key_hash, step_hash, default), True
+
+    def _find_slot(self, key: str, key_hash: int) -> tuple:
+        """
+        Method to return the live entry for key, or None, the slot a new entry for key would go in, and the step
+        hash of key. One walk of the probe sequence both looks for the key and picks the slot for it, reusing the
+        first tombstone on the path. The slot stays right until the map's version changes
+        """
+        # Set hash value and the step to the next slot of the probe sequence. Set count to bound the loop
+        step_hash = self._step_hash(key)
+        hash = key_hash % self._capacity
+        step, growth = self._probe_steps(step_hash, self._capacity)
+        count = 1
+        # First tombstone seen on the probe path, reused if the key is not further along
+        open_slot = None
+        # Loop while location in the hash map. The key may sit past a tombstone, so keep probing until None
+        while self._buckets[hash] is not None and count <= self._capacity:
+            entry = self._buckets[hash]
+            if entry.is_tombstone is True:
+                if open_slot is None:
+                    open_slot = hash
+            elif entry.hash == key_hash and entry.key == key:
+                if self._stats is not None:
+                    self._stats.record_probe(count)
+                return entry, None, step_hash
+            # move hash along the probe sequence and increment count for next loop
+            hash = (hash + step) % self._capacity
+            step += growth
+            count += 1
+        if self._stats is not None:
+            self._stats.record_probe(count)
+
+        # Key not moved over yet by an incremental rehash, use it where it is
+        if self._old_buckets is not None:
+            index = self._probe(self._old_buckets, self._old_capacity, key, key_hash, step_hash)
+            if index != -1:
+                return self._old_buckets[index], None, step_hash
+
+        return None, (hash if open_slot is None else open_slot), step_hash
+
+    def _add_at(self, slot: int, key: str, key_hash: int, step_hash: int, value: object) -> HashEntry:
+        """
+        Method to place a new entry for an absent key in the slot picked for it by _find_slot and return it
+        """
+        if self._buckets[slot] is not None:
+            # Only a tombstone can be picked over an empty slot
+            self._tombstones -= 1
+            if self._stats is not None:
+                self._stats.tombstone_reuses += 1
+        entry = HashEntry(key, value, key_hash, step_hash)
+        self._buckets.set_at_index(slot, entry)
+        self._size += 1
+        self._version += 1
+        return entry
+
+    def _step_hash(self, key: str) -> int:
+        """
+        Method to return the hash double hashing steps by for key, or None when probing is linear or quadratic
+        and no step hash is needed. Entries cache it, so it is worked out once per key like the full hash
+        """
+        if self._probing != 'double':
+            return None
+        return self._step_function(key)
+
+    def _probe_steps(self, step_hash: int, capacity: int) -> tuple:
+        """
+        Method to return how the probe sequence for a key with the given step hash moves through a table of the
+        given capacity, as the first step and how much the step grows after each probe. Quadratic steps of
+        1, 3, 5, ... land on home + i ** 2. Double hashing steps by 1 + step hash % (capacity - 1), which visits
+        every slot of a prime capacity
+        """
+        if self._probing == 'quadratic':
+            return 1, 2
+        if self._probing == 'linear':
+            return 1, 0
+        return 1 + step_hash % max(capacity - 1, 1), 0
+
+    def _probe(self, buckets: DynamicArray, capacity: int, key: str, key_hash: int, step_hash: int) -> int:
+        """
+        Method to follow the probe sequence for key in a bucket array and return the index of its live
+        entry, or -1 if absent
+        """
+        hash = key_hash % capacity
+        step, growth = self._probe_steps(step_hash, capacity)
         count = 1
-        # Check if empty, if so increment and add key/value
-        if self._buckets[hash] is None:
-            self._size += 1
-            self._buckets.set_at_index(hash, HashEntry(key, value))
-
-        else:
-            # Loop while location in the hash map
-            while self._buckets[hash]:
-                #Check if location has key or tombstone, if so we need to update
-                if self._buckets[hash].key == key or self._buckets[hash].is_tombstone is True:
-                    # Check if tombstone, if it is, we can increment size. If key present, only need to replace
-                    if self._buckets[hash].is_tombstone is True:
-                        self._size += 1
-                    # replace and update tombstone to false. Return to ensure size not incremented again
-                    self._buckets.set_at_index(hash, HashEntry(key, value))
-                    self._buckets[hash].is_tombstone = False
-                    return
-                # update hash with quad probe formula and increment count for next loop
-                else:
-                    hash = (oa_key + count ** 2) % self._capacity
-                    count += 1
-
-            self._buckets.set_at_index(hash, HashEntry(key, value))
-            self._size += 1
+        # Stop at the first empty slot, skipping tombstones along the way
+        while buckets[hash] is not None and count <= capacity:
+            entry = buckets[hash]
+            # Compare cached hashes first so unequal keys are rejected cheaply
+            if entry.hash == key_hash and entry.is_tombstone is False and entry.key == key:
+                if self._stats is not None:
+                    self._stats.record_probe(count)
+                return hash
+            hash = (hash + step) % capacity
+            step += growth
+            count += 1
+        if self._stats is not None:
+            self._stats.record_probe(count)
+        return -1
+
+    def _find_entry(self, key: str, key_hash: int) -> HashEntry:
+        """
+        Method to return the live entry for key, or None if absent. While an incremental rehash is running, the
+        old table is checked too
+        """
+        step_hash = self._step_hash(key)
+        index = self._probe(self._buckets, self._capacity, key, key_hash, step_hash)
+        if index != -1:
+            return self._buckets[index]
+        if self._old_buckets is not None:
+            index = self._probe(self._old_buckets, self._old_capacity, key, key_hash, step_hash)
+            if index != -1:
+                return self._old_buckets[index]
+        return None
+
+    def _remove_entry(self, key: str, key_hash: int) -> bool:
+        """
+        Method to turn the live entry for key into a tombstone, in whichever table has it. Only tombstones in the
+        current table are counted, the old table's are dropped when it is moved over. Return True if removed
+        """
+        step_hash = self._step_hash(key)
+        index = self._probe(self._buckets, self._capacity, key, key_hash, step_hash)
+        if index != -1:
+            self._buckets[index].is_tombstone = True
+            self._tombstones += 1
+            self._size -= 1
+            self._version += 1
+            return True
+
+        if self._old_buckets is not None:
+            index = self._probe(self._old_buckets, self._old_capacity, key, key_hash, step_hash)
+            if index != -1:
+                self._old_buckets[index].is_tombstone = True
+                self._size -= 1
+                self._version += 1
+                return True
+        return False
+
+    def _grow(self) -> None:
+        """
+        Method to double the table. With incremental_step set, only a new bucket array is made here and the
+        entries are moved over a few buckets at a time by later operations
+        """
+        new_capacity = grown_capacity(self._capacity)
+
+        if self._incremental_step <= 0:
+            self._rehash(new_capacity)
+            return
 
+        started = time.perf_counter() if self._stats is not None else 0.0
+        self._finish_migration()
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._migrate_index = 0
+
+        self._capacity = new_capacity
+        self._buckets = DynamicArray([None] * self._capacity)
+        self._tombstones = 0
+        self._version += 1
+        if self._stats is not None:
+            self._stats.record_resize(time.perf_counter() - started)
+
+    def _step(self, operations: int = 1) -> None:
+        """
+        Method to move the incremental rehash along by incremental_step buckets for each operation
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._incremental_step * operations)
+
+    def _migrate(self, buckets: int) -> None:
+        """
+        Method to move the live entries of up to the given number of buckets of the old table into the current
+        one, dropping the old table once every bucket has been moved. Moved entries stay in the old table too,
+        so probe paths through it stay whole, but the current table is always checked first
+        """
+        end = min(self._migrate_index + buckets, self._old_capacity)
+        for x in range(self._migrate_index, end):
+            entry = self._old_buckets[x]
+            if entry is None or entry.is_tombstone is True:
+                continue
+            # The key cannot be in the current table yet, so take the first empty slot or tombstone
+            hash = entry.hash % self._capacity
+            step, growth = self._probe_steps(entry.step_hash, self._capacity)
+            while self._buckets[hash] is not None and self._buckets[hash].is_tombstone is False:
+                hash = (hash + step) % self._capacity
+                step += growth
+            if self._buckets[hash] is not None:
+                self._tombstones -= 1
+                if self._stats is not None:
+                    self._stats.tombstone_reuses += 1
+            self._buckets.set_at_index(hash, entry)
+        self._migrate_index = end
+        self._version += 1
+
+        if end == self._old_capacity:
+            self._old_buckets = None
+
+    def _finish_migration(self) -> None:
+        """
+        Method to move everything left in the old table, if an incremental rehash is running
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
 
     def table_load(self) -> float:
         """
@@ -132,12 +456,8 @@ class HashMap:
         """
         Method to return the number of empty buckets for the hash map
         """
-        empty = 0
-        # Loop through hash map checking for none or tombstone and tally empty buckets
-        for x in range(self._capacity):
-            if self._buckets[x] is None or self._buckets[x].is_tombstone is True:
-                empty += 1
-        return empty
+        # Tombstones count as empty, so every bucket not holding a live entry is empty
+        return self._capacity - self._size
 
     def resize_table(self, new_capacity: int) -> None:
         """
@@ -146,104 +466,283 @@ class HashMap:
         if new_capacity < self._size:
             return
 
-        # Check if new capacity is prime. If not, update with next_prime
-        if self._is_prime(new_capacity) is False:
-            new_capacity = self._next_prime(new_capacity)
+        self._rehash(fitted_capacity(new_capacity, self._size, 0.5))
 
-        # new hash map with capacity
-        new_hash = HashMap(new_capacity, self._hash_function)
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Method to move every live entry into a new bucket array of the given capacity. Entries are placed using
+        their cached hash, without duplicate checks, load checks or new allocations. Tombstones are dropped
+        """
+        started = time.perf_counter() if self._stats is not None else 0.0
+        self._finish_migration()
+        buckets = DynamicArray([None] * new_capacity)
 
-        # Catch for 2 or it will increase to 3 after creating new hash map
-        if new_capacity == 2:
-            new_hash._capacity = 2
-        # Loop through hash map and place keys from old hash map in new one
-        for x in self:
-            if x is not None:
-                new_hash.put(x.key, x.value)
+        for x in range(self._buckets.length()):
+            entry = self._buckets[x]
+            if entry is None or entry.is_tombstone is True:
+                continue
+            # The new table holds no tombstones, so the first empty slot on the probe path is the spot
+            hash = entry.hash % new_capacity
+            step, growth = self._probe_steps(entry.step_hash, new_capacity)
+            while buckets[hash] is not None:
+                hash = (hash + step) % new_capacity
+                step += growth
+            buckets.set_at_index(hash, entry)
 
-        # Update capacity, size and the new hash map that has been resized
-        self._capacity = new_hash._capacity
-        self._buckets = new_hash._buckets
-        self._size = new_hash._size
+        self._capacity = new_capacity
+        self._buckets = buckets
+        self._tombstones = 0
+        self._version += 1
+        if self._stats is not None:
+            self._stats.record_resize(time.perf_counter() - started)
 
     def get(self, key: str) -> object:
         """
         Method to check for key in hash map and return its value if found
         """
-        # Loop through hash map and check if location is not none
-        for x in self:
-            if x is not None:
-                # If key matches location and not a tombstone, return value
-                if x.key == key and x.is_tombstone is False:
-                    return x.value
-        return None
+        self._step()
+        entry = self._find_entry(key, self._hash_function(key))
+        if self._stats is not None:
+            self._stats.record_lookup(entry is not None)
+        if entry is None:
+            return None
+        return entry.value
 
     def contains_key(self, key: str) -> bool:
         """
         Method to return True if a key is in the hash map
         """
-        # Use get to determine if key in hash map
-        if self.get(key) is not None:
-            return True
-        return False
+        self._step()
+        entry = self._find_entry(key, self._hash_function(key))
+        if self._stats is not None:
+            self._stats.record_lookup(entry is not None)
+        return entry is not None
 
     def remove(self, key: str) -> None:
         """
         Method to search and remove key in the hash map
         """
-        # Loop through hash map
-        for x in self:
-            # Check truth value of x and then check if key matches and tombstone is false. Change location to tombstone
-            if x:
-                if x.key == key and x.is_tombstone is False:
-                    x.is_tombstone = True
-                    self._size -= 1
+        self._step()
+        # Follow the probe sequence to the entry and change location to tombstone
+        if self._remove_entry(key, self._hash_function(key)) is True:
+            self._tidy()
+
+    def _tidy(self) -> None:
+        """
+        Method to run after removals. Shrink the table if shrinking is on, otherwise clear tombstones once there
+        are too many
+        """
+        if self._shrink() is True:
+            return
+        # Too many tombstones lengthen every probe path, so clear them with a same capacity rehash
+        if self._tombstones >= self._max_tombstone_ratio * self._capacity:
+            self._rehash(self._capacity)
+
+    def put_many(self, pairs) -> None:
+        """
+        Method to add a batch of (key, value) pairs, given as a DynamicArray or any iterable. The table is grown
+        once for the whole batch and all keys are hashed together
+        """
+        pairs = as_list(pairs)
+        self._step(len(pairs))
+        keys = [pair[0] for pair in pairs]
+        hashes = hash_many(self._hash_function, keys)
+        # Grow once for the whole batch, so no put in it has to. Room is only given to the distinct keys not held
+        # yet, and those are only counted when the batch could need more room at all
+        if batch_capacity(self._size, len(pairs), self._capacity, 0.5) is not None:
+            count = new_key_count(keys, hashes, lambda key, key_hash: self._find_entry(key, key_hash) is not None)
+            new_capacity = batch_capacity(self._size, count, self._capacity, 0.5)
+            if new_capacity is not None:
+                self.resize_table(new_capacity)
+
+        for x in range(len(pairs)):
+            self._insert(pairs[x][0], pairs[x][1], hashes[x])
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Method to look up a batch of keys, given as a DynamicArray or any iterable. Return a dynamic array with
+        the value of each key in the same order, or None where the key is not found
+        """
+        keys = as_list(keys)
+        self._step(len(keys))
+        hashes = hash_many(self._hash_function, keys)
+        da = DynamicArray()
+        for x in range(len(keys)):
+            entry = self._find_entry(keys[x], hashes[x])
+            if self._stats is not None:
+                self._stats.record_lookup(entry is not None)
+            da.append(entry.value if entry is not None else None)
+        return da
+
+    def remove_many(self, keys) -> None:
+        """
+        Method to remove a batch of keys, given as a DynamicArray or any iterable. Shrinking and tombstone
+        clean up run once, after the whole batch
+        """
+        keys = as_list(keys)
+        self._step(len(keys))
+        hashes = hash_many(self._hash_function, keys)
+        for x in range(len(keys)):
+            self._remove_entry(keys[x], hashes[x])
+        self._tidy()
+
+    def _shrink(self) -> bool:
+        """
+        Method to shrink the table once the load falls below min_load, leaving room so a few puts or removes do
+        not flip it back and forth (see shrunk_capacity). Return True if the table was shrunk
+        """
+        new_capacity = shrunk_capacity(self._size, self._capacity, self._min_capacity, self._min_load)
+        if new_capacity is None:
+            return False
+        self._rehash(new_capacity)
+        return True
 
     def clear(self) -> None:
         """
-        Method to clear the hash map
+        Method to clear the hash map. If shrinking is on, go back to the starting capacity
         """
+        if self._min_load > 0:
+            self._capacity = self._min_capacity
         self._buckets = DynamicArray()
+        self._old_buckets = None
         # Loop through hash map and for each location, append none and set size to 0
         for x in range(self._capacity):
             self._buckets.append(None)
         self._size = 0
-            
+        self._tombstones = 0
+        self._version += 1
+
+    def get_stats(self) -> dict:
+        """
+        Method to return a snapshot dict of the map: size, capacity, load and tombstone count. For a map created
+        with stats=True it also holds the hit/miss, resize and tombstone reuse counters and the distribution of
+        probe lengths as slots visited -> number of probes
+        """
+        snapshot = self._stats.snapshot() if self._stats is not None else {}
+        snapshot.update(size=self._size, capacity=self._capacity, load=self.table_load(),
+                        tombstones=self._tombstones)
+        return snapshot
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         Method to return a dynamic array with key/value pairs
         """
-        da = DynamicArray()
-        # Loop through hash map and check for
-        for x in self:
-            # Check value is assigned in location and not tombstone. Add the key/value to the array
-            if x and x.is_tombstone is False:
-                da.append((x.key, x.value))
-        return da
+        return DynamicArray(list(self.items()))
+
+    def copy(self) -> "HashMap":
+        """
+        Method to return a new hash map with the same keys, values and settings. Each live entry is copied into
+        the first empty slot of its probe sequence using its cached hashes, so no key is hashed again, and this
+        map is not changed. Tombstones are not copied, and a copy made while an incremental rehash is running
+        holds every entry in its current table
+        """
+        # The constructor fills its table one append at a time, so the copy is made at the smallest capacity and
+        # given the capacity and a table built here as a plain list
+        clone = type(self)(1, self._hash_function, self._max_tombstone_ratio, self._min_load,
+                           self._incremental_step, self._probing, self._step_function, self._stats is not None)
+        capacity = self._capacity
+        buckets = [None] * capacity
+        tables = [(self._buckets, 0)]
+        if self._old_buckets is not None:
+            # Entries before the migrate index have already been moved over
+            tables.append((self._old_buckets, self._migrate_index))
+        for old_buckets, start in tables:
+            for x in range(start, old_buckets.length()):
+                entry = old_buckets[x]
+                if entry is None or entry.is_tombstone is True:
+                    continue
+                hash = entry.hash % capacity
+                step, growth = self._probe_steps(entry.step_hash, capacity)
+                while buckets[hash] is not None:
+                    hash = (hash + step) % capacity
+                    step += growth
+                buckets[hash] = HashEntry(entry.key, entry.value, entry.hash, entry.step_hash)
+        clone._buckets = DynamicArray(buckets)
+        clone._capacity = capacity
+        clone._min_capacity = self._min_capacity
+        clone._size = self._size
+        return clone
+
+    def save(self, path: str) -> None:
+        """
+        Method to write the hash map to path as a binary snapshot (see hash_map_codec), which load reads back.
+        Tombstones are not saved
+        """
+        write_snapshot(path, self._capacity, self._size, self._hash_function,
+                       ((entry.hash, entry.key, entry.value) for entry in self))
+
+    @classmethod
+    def load(cls, path: str, function: callable = None, **options) -> "HashMap":
+        """
+        Method to build a map from a snapshot written by save. The table is made at the saved capacity up front
+        and each entry is placed straight into the first empty slot of its probe sequence, without duplicate or
+        load checks. function is only needed for a map saved with a hash function hash_map_codec does not know.
+        Other options are passed on to the constructor
+        """
+        capacity, size, function, entries = read_snapshot(path, function)
+        # The constructor fills its table one append at a time, so the map is made at the smallest capacity and
+        # given the saved capacity and a table built here as a plain list
+        map = cls(1, function, **options)
+        buckets = [None] * capacity
+        double = map._probing == 'double'
+        step_function = map._step_function
+        step_hash = None
+        # Linear and quadratic probing step the same way for every key
+        first_step, growth = map._probe_steps(None, capacity) if not double else (None, None)
+        for key_hash, key, value in entries:
+            # A snapshot does not hold step hashes, so double hashing works each one out here, once
+            if double:
+                step_hash = step_function(key)
+                step, growth = map._probe_steps(step_hash, capacity)
+            else:
+                step = first_step
+            # The new table holds no tombstones, so the first empty slot on the probe path is the spot
+            hash = key_hash % capacity
+            while buckets[hash] is not None:
+                hash = (hash + step) % capacity
+                step += growth
+            buckets[hash] = HashEntry(key, value, key_hash, step_hash)
+        map._buckets = DynamicArray(buckets)
+        map._capacity = map._min_capacity = capacity
+        map._size = size
+        map._version += 1
+        return map
+
+    def _entries(self):
+        """
+        Method to yield each live entry of the current table in bucket order. Used by the iterators, which check
+        the map has not changed between entries
+        """
+        for x in range(self._capacity):
+            entry = self._buckets[x]
+            # Check value is assigned in location and not tombstone
+            if entry is not None and entry.is_tombstone is False:
+                yield entry
 
-    def __iter__(self):
+    def keys(self) -> KeysView:
         """
-        Method to allow iteration through the hash map
+        Method to return a lazy view of the keys of the hash map
         """
-        self.index = 0
-        return self
+        return KeysView(self)
 
-    def __next__(self):
+    def values(self) -> ValuesView:
         """
-        Method to return next item in hash map
+        Method to return a lazy view of the values of the hash map
         """
-        # Set initial value to none and begin the loop
-        # If value is None or is a tombstone, update value to current index and increment index to move to next spot
-        try:
-            value = None
-            while value is None or value.is_tombstone is True:
-                value = self._buckets[self.index]
-                self.index += 1
-        except DynamicArrayException:
-            raise StopIteration
+        return ValuesView(self)
 
-        return value
+    def items(self) -> ItemsView:
+        """
+        Method to return a lazy view of the (key, value) pairs of the hash map
+        """
+        return ItemsView(self)
+
+    def __iter__(self) -> HashMapIterator:
+        """
+        Method to allow iteration through the hash map. Each live entry is handed out as a HashEntry, and every
+        call gets its own iterator
+        """
+        return HashMapIterator(self)
 
 
 # ------------------- BASIC TESTING ---------------------------------------- #
@@ -0,0 +1,266 @@
+# Course:      CS261 - Data Structures
+# Assignment:  6
+# Description: On-disk layout for the open addressing HashMap. write_map
+#              saves a map once, and MappedHashMap opens the file with mmap
+#              for read-only get and contains_key. Nothing is rebuilt on
+#              open and pages are only read from disk when a lookup touches
+#              them, so startup takes the same time for any size of map.
+#
+#              File layout, all little endian:
+#                header  magic, format version, probing, capacity, size,
+#                        and the names of the hash and step functions
+#                slots   capacity fixed width slots of (hash, key offset,
+#                        value offset, state), in the same positions as in
+#                        the map's table, so the same probing finds them
+#                blobs   length prefixed key and value records, see
+#                        hash_map_codec
+#
+#              Slots are found again from stored hashes, so only the hash
+#              functions registered in hash_map_codec.SNAPSHOT_HASH_FUNCTIONS
+#              are accepted by default. The built in hash is seeded per
+#              process, and a lambda or other function can share a name
+#              while hashing differently, so either would open fine and then
+#              miss every key. Pass allow_unregistered=True to use a function
+#              known to be stable anyway.
+
+import mmap
+import struct
+
+import hash_map_oa
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+from hash_map_codec import (SNAPSHOT_HASH_FUNCTIONS, decode_key, decode_value, encode_key, encode_value,
+                            pack_record, read_record)
+
+MAGIC = b'A6OAMAP\x00'
+FORMAT_VERSION = 1
+
+# magic, version, probing, capacity, size, hash function name, step function name
+_HEADER = struct.Struct('<8sIIQQ64s64s')
+# full hash of the key, key offset, value offset, state
+_SLOT = struct.Struct('<QQQB7x')
+
+# Slot states
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+_PROBING = ('linear', 'quadratic', 'double')
+
+# Stored hashes are the low 64 bits of the full hash
+_HASH_MASK = (1 << 64) - 1
+
+
+def _function_name(function: callable) -> bytes:
+    """Return the name stored for a hash function, which must match when the file is opened."""
+    return getattr(function, '__name__', '').encode('utf-8')[:64]
+
+
+def _check_function(function: callable, role: str, allow_unregistered: bool) -> None:
+    """
+    Raise ValueError if function is not the one registered under its name in SNAPSHOT_HASH_FUNCTIONS, unless
+    allow_unregistered is True. role names the function in the message
+    """
+    name = getattr(function, '__name__', repr(function))
+    if allow_unregistered is False and SNAPSHOT_HASH_FUNCTIONS.get(name) is not function:
+        raise ValueError(f"{role} {name} is not registered in SNAPSHOT_HASH_FUNCTIONS, so its hashes may not "
+                         f"match between processes. Pass allow_unregistered=True if it is stable")
+
+
+def write_map(map: hash_map_oa.HashMap, path: str, allow_unregistered: bool = False) -> None:
+    """
+    Method to write an open addressing HashMap to path. Any incremental rehash is finished first. Tombstones
+    are kept as tombstone slots so probe sequences through them stay whole. The map's hash function, and its
+    step function for double hashing, must be registered unless allow_unregistered is True
+    """
+    _check_function(map._hash_function, 'hash function', allow_unregistered)
+    if map._probing == 'double':
+        _check_function(map._step_function, 'step function', allow_unregistered)
+
+    map._finish_migration()
+    capacity = map.get_capacity()
+    slots = bytearray(_SLOT.size * capacity)
+    blobs = bytearray()
+
+    for x in range(capacity):
+        entry = map._buckets[x]
+        if entry is None:
+            continue
+        # A tombstone only has to keep probe sequences going, so its key and value are not written
+        if entry.is_tombstone is True:
+            _SLOT.pack_into(slots, x * _SLOT.size, 0, 0, 0, TOMBSTONE)
+            continue
+        key_offset = len(blobs)
+        blobs += pack_record(encode_key(entry.key))
+        value_offset = len(blobs)
+        blobs += pack_record(encode_value(entry.value))
+        _SLOT.pack_into(slots, x * _SLOT.size, entry.hash & _HASH_MASK, key_offset, value_offset, LIVE)
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, _PROBING.index(map._probing), capacity, map.get_size(),
+                          _function_name(map._hash_function), _function_name(map._step_function))
+    with open(path, 'wb') as file:
+        file.write(header)
+        file.write(slots)
+        file.write(blobs)
+
+
+class MappedHashMap:
+    """
+    Read-only open addressing hash map backed by a file written with
+    write_map and mapped into memory
+    """
+
+    def __init__(self, path: str, function: callable, step_function: callable = None,
+                 allow_unregistered: bool = False) -> None:
+        """
+        Open the map at path. function, and step_function for double hashing, must be the ones the map was
+        written with, and must be registered unless allow_unregistered is True. The step function defaults the
+        same way as in hash_map_oa
+        """
+        if step_function is None:
+            step_function = hash_function_1 if function is hash_function_2 else hash_function_2
+        _check_function(function, 'hash function', allow_unregistered)
+
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, probing, capacity, size, function_name, step_name = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} HashMap file")
+
+        self._probing = _PROBING[probing]
+        function_name = function_name.rstrip(b'\x00')
+        step_name = step_name.rstrip(b'\x00')
+        try:
+            if function_name != _function_name(function):
+                raise ValueError(f"{path} was written with hash function {function_name.decode()}, "
+                                 f"not {_function_name(function).decode()}")
+            if self._probing == 'double':
+                _check_function(step_function, 'step function', allow_unregistered)
+                if step_name != _function_name(step_function):
+                    raise ValueError(f"{path} was written with step function {step_name.decode()}, "
+                                     f"not {_function_name(step_function).decode()}")
+        except ValueError:
+            self._mmap.close()
+            raise
+
+        self._hash_function = function
+        self._step_function = step_function
+        self._capacity = capacity
+        self._size = size
+        self._blobs = _HEADER.size + _SLOT.size * capacity
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._mmap.close()
+
+    def __enter__(self) -> "MappedHashMap":
+        """Return the map for use in a with statement."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Unmap the file at the end of a with statement."""
+        self.close()
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def table_load(self) -> float:
+        """
+        Method to return load factor for hash map
+        """
+        return self._size / self._capacity
+
+    def _find_slot(self, key: str) -> tuple:
+        """
+        Method to follow the probe sequence for key through the slot table, as the HashMap it was written from
+        would. Return the live slot holding key, or None if absent
+        """
+        key_hash = self._hash_function(key)
+        stored_hash = key_hash & _HASH_MASK
+        stored_key = encode_key(key)
+        capacity = self._capacity
+
+        if self._probing == 'quadratic':
+            step, growth = 1, 2
+        elif self._probing == 'linear':
+            step, growth = 1, 0
+        else:
+            step, growth = 1 + self._step_function(key) % max(capacity - 1, 1), 0
+
+        hash = key_hash % capacity
+        count = 1
+        while count <= capacity:
+            slot = _SLOT.unpack_from(self._mmap, _HEADER.size + hash * _SLOT.size)
+            if slot[3] == EMPTY:
+                return None
+            # Compare stored hashes first so unequal keys are rejected without reading their blobs
+            if slot[3] == LIVE and slot[0] == stored_hash and \
+                    read_record(self._mmap, self._blobs + slot[1])[0] == stored_key:
+                return slot
+            hash = (hash + step) % capacity
+            step += growth
+            count += 1
+        return None
+
+    def get(self, key: str) -> object:
+        """
+        Method to check for key in hash map and return its value if found
+        """
+        slot = self._find_slot(key)
+        if slot is None:
+            return None
+        return decode_value(read_record(self._mmap, self._blobs + slot[2])[0])
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Method to return True if a key is in the hash map
+        """
+        return self._find_slot(key) is not None
+
+    def items(self):
+        """
+        Method to iterate through the (key, value) pairs of the hash map in slot order
+        """
+        for x in range(self._capacity):
+            slot = _SLOT.unpack_from(self._mmap, _HEADER.size + x * _SLOT.size)
+            if slot[3] == LIVE:
+                yield (decode_key(read_record(self._mmap, self._blobs + slot[1])[0]),
+                       decode_value(read_record(self._mmap, self._blobs + slot[2])[0]))
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Method to return a dynamic array with key/value pairs
+        """
+        return DynamicArray(list(self.items()))
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import os
+    import tempfile
+
+    print("\nwrite / open / get")
+    print("------------------")
+    m = hash_map_oa.HashMap(11, hash_function_2)
+    for i in range(25):
+        m.put('key' + str(i), i * 10)
+    m.put('nested', {'a': [1, 2]})
+    m.remove('key7')
+
+    path = os.path.join(tempfile.mkdtemp(), 'map.bin')
+    write_map(m, path)
+    with MappedHashMap(path, hash_function_2) as disk:
+        print(disk.get_size(), disk.get_capacity(), disk.get('key3'), disk.get('key7'), disk.get('nested'))
+        print(disk.contains_key('key24'), disk.contains_key('key25'), sorted(disk.items()) == sorted(m.items()))
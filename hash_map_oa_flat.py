@@ -0,0 +1,352 @@
+# Course:      CS261 - Data Structures
+# Assignment:  6
+# Description: Open addressing hashmap that keeps its slots in parallel
+#              flat arrays (keys, values, cached hashes and a state byte
+#              per slot) instead of one HashEntry object per slot.
+#              Offers the basic methods of the HashMap in hash_map_oa.py,
+#              the batch methods, min_load shrinking, tombstone clean up
+#              and iteration over HashEntry objects. Probing is always
+#              quadratic, and it has no with_expected_size, incremental
+#              rehashing, stats, upserts, views, copy or save and load.
+
+from array import array
+
+from a6_include import (DynamicArray, HashEntry, as_list, hash_many,
+                        batch_capacity, check_min_load, new_key_count, fitted_capacity, grown_capacity,
+                        next_prime, shrunk_capacity,
+                        hash_function_1, hash_function_2)
+
+
+# Slot states stored in the state byte array
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+# Cached hashes are stored as unsigned 64 bit values
+_HASH_MASK = (1 << 64) - 1
+
+
+class HashMap:
+    def __init__(self, capacity: int, function,
+                 max_tombstone_ratio: float = 0.25,
+                 min_load: float = 0.0) -> None:
+        """
+        Initialize new HashMap that uses
+        quadratic probing for collision resolution and stores
+        its slots as flat arrays.
+        Once tombstones take up max_tombstone_ratio of the buckets,
+        the table is rehashed in place to clear them.
+        When min_load is above 0, remove and clear shrink the table once
+        the load drops below it, never going under the starting capacity.
+        min_load must be below 0.125, a quarter of the 0.5 load limit
+        """
+        # capacity must be a prime number
+        self._capacity = next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._size = 0
+        self._tombstones = 0
+        self._max_tombstone_ratio = max_tombstone_ratio
+        self._min_capacity = self._capacity
+        check_min_load(min_load, 0.5)
+        self._min_load = min_load
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._states[i] == EMPTY:
+                out += str(i) + ': None\n'
+            else:
+                entry = HashEntry(self._keys[i], self._values[i], self._hashes[i])
+                entry.is_tombstone = self._states[i] == TOMBSTONE
+                out += str(i) + ': ' + str(entry) + '\n'
+        return out
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Method to create empty slot arrays for the given capacity
+        """
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._states = bytearray(capacity)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Method to update key/value pairs in hash map. Use open addressing to find correct location
+        """
+        # Resize if needed
+        if self.table_load() >= 0.5:
+            self._rehash(grown_capacity(self._capacity))
+
+        self._insert(key, value, self._hash_function(key))
+
+    def _insert(self, key: str, value: object, key_hash: int) -> None:
+        """
+        Method to add or update key/value using an already computed hash of the key. Does not check the load
+        """
+        key_hash &= _HASH_MASK
+        states, capacity = self._states, self._capacity
+        hash = key_hash % capacity
+        oa_key = hash
+        count = 1
+        # First tombstone seen on the probe path, reused if the key is not further along
+        open_slot = -1
+        while states[hash] != EMPTY and count <= capacity:
+            if states[hash] == TOMBSTONE:
+                if open_slot == -1:
+                    open_slot = hash
+            elif self._hashes[hash] == key_hash and self._keys[hash] == key:
+                # Key present, only need to replace the value
+                self._values[hash] = value
+                return
+            hash = (oa_key + count ** 2) % capacity
+            count += 1
+
+        if open_slot == -1:
+            open_slot = hash
+        else:
+            self._tombstones -= 1
+        self._keys[open_slot] = key
+        self._values[open_slot] = value
+        self._hashes[open_slot] = key_hash
+        states[open_slot] = LIVE
+        self._size += 1
+
+    def _find_index(self, key: str, key_hash: int = None) -> int:
+        """
+        Method to follow the quad probe sequence for key and return the index of its live slot, or -1 if absent.
+        The key is hashed unless its hash is given
+        """
+        if key_hash is None:
+            key_hash = self._hash_function(key)
+        key_hash &= _HASH_MASK
+        states, hashes, capacity = self._states, self._hashes, self._capacity
+        hash = key_hash % capacity
+        oa_key = hash
+        count = 1
+        # Stop at the first empty slot, skipping tombstones along the way
+        while states[hash] != EMPTY and count <= capacity:
+            if states[hash] == LIVE and hashes[hash] == key_hash and self._keys[hash] == key:
+                return hash
+            hash = (oa_key + count ** 2) % capacity
+            count += 1
+        return -1
+
+    def table_load(self) -> float:
+        """
+        Method to return load factor for hash map
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Method to return the number of empty buckets for the hash map
+        """
+        # Tombstones count as empty, so every bucket not holding a live entry is empty
+        return self._capacity - self._size
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Method to resize the hash table based on value given.
+        """
+        if new_capacity < self._size:
+            return
+
+        self._rehash(fitted_capacity(new_capacity, self._size, 0.5))
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Method to move every live slot into new arrays of the given capacity. Tombstones are dropped
+        """
+        keys, values, hashes, states = self._keys, self._values, self._hashes, self._states
+        self._allocate(new_capacity)
+        new_states = self._states
+
+        for x in range(len(states)):
+            if states[x] != LIVE:
+                continue
+            # The new table holds no tombstones, so the first empty slot on the probe path is the spot
+            hash = hashes[x] % new_capacity
+            oa_key = hash
+            count = 1
+            while new_states[hash] != EMPTY:
+                hash = (oa_key + count ** 2) % new_capacity
+                count += 1
+            self._keys[hash] = keys[x]
+            self._values[hash] = values[x]
+            self._hashes[hash] = hashes[x]
+            new_states[hash] = LIVE
+
+        self._capacity = new_capacity
+        self._tombstones = 0
+
+    def get(self, key: str) -> object:
+        """
+        Method to check for key in hash map and return its value if found
+        """
+        index = self._find_index(key)
+        if index == -1:
+            return None
+        return self._values[index]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Method to return True if a key is in the hash map
+        """
+        return self._find_index(key) != -1
+
+    def remove(self, key: str) -> None:
+        """
+        Method to search and remove key in the hash map
+        """
+        index = self._find_index(key)
+        if index != -1:
+            self._remove_at(index)
+            self._tidy()
+
+    def _remove_at(self, index: int) -> None:
+        """
+        Method to turn a live slot into a tombstone. Like a HashEntry tombstone, the slot keeps its key and value
+        until it is reused or the table is rehashed
+        """
+        self._states[index] = TOMBSTONE
+        self._size -= 1
+        self._tombstones += 1
+
+    def _tidy(self) -> None:
+        """
+        Method to run after removals. Shrink the table if shrinking is on, otherwise clear tombstones once there
+        are too many
+        """
+        if self._shrink() is True:
+            return
+        # Too many tombstones lengthen every probe path, so clear them with a same capacity rehash
+        if self._tombstones >= self._max_tombstone_ratio * self._capacity:
+            self._rehash(self._capacity)
+
+    def _shrink(self) -> bool:
+        """
+        Method to shrink the table once the load falls below min_load (see shrunk_capacity). Return True if the
+        table was shrunk
+        """
+        new_capacity = shrunk_capacity(self._size, self._capacity, self._min_capacity, self._min_load)
+        if new_capacity is None:
+            return False
+        self._rehash(new_capacity)
+        return True
+
+    def put_many(self, pairs) -> None:
+        """
+        Method to add a batch of (key, value) pairs, given as a DynamicArray or any iterable. The table is grown
+        once for the whole batch and all keys are hashed together
+        """
+        pairs = as_list(pairs)
+        keys = [pair[0] for pair in pairs]
+        hashes = hash_many(self._hash_function, keys)
+        # Grow once for the whole batch, so no put in it has to. Room is only given to the distinct keys not held
+        # yet, and those are only counted when the batch could need more room at all
+        if batch_capacity(self._size, len(pairs), self._capacity, 0.5) is not None:
+            count = new_key_count(keys, hashes, lambda key, key_hash: self._find_index(key, key_hash) != -1)
+            new_capacity = batch_capacity(self._size, count, self._capacity, 0.5)
+            if new_capacity is not None:
+                self.resize_table(new_capacity)
+
+        for x in range(len(pairs)):
+            self._insert(pairs[x][0], pairs[x][1], hashes[x])
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Method to look up a batch of keys, given as a DynamicArray or any iterable. Return a dynamic array with
+        the value of each key in the same order, or None where the key is not found
+        """
+        keys = as_list(keys)
+        hashes = hash_many(self._hash_function, keys)
+        da = DynamicArray()
+        for x in range(len(keys)):
+            index = self._find_index(keys[x], hashes[x])
+            da.append(self._values[index] if index != -1 else None)
+        return da
+
+    def remove_many(self, keys) -> None:
+        """
+        Method to remove a batch of keys, given as a DynamicArray or any iterable. Shrinking and tombstone
+        clean up run once, after the whole batch
+        """
+        keys = as_list(keys)
+        hashes = hash_many(self._hash_function, keys)
+        for x in range(len(keys)):
+            index = self._find_index(keys[x], hashes[x])
+            if index != -1:
+                self._remove_at(index)
+        self._tidy()
+
+    def clear(self) -> None:
+        """
+        Method to clear the hash map. If shrinking is on, go back to the starting capacity
+        """
+        if self._min_load > 0:
+            self._capacity = self._min_capacity
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Method to return a dynamic array with key/value pairs
+        """
+        da = DynamicArray()
+        for x in range(self._capacity):
+            if self._states[x] == LIVE:
+                da.append((self._keys[x], self._values[x]))
+        return da
+
+    def __iter__(self):
+        """
+        Method to iterate through the live entries of the hash map. Each one is handed out as a HashEntry
+        """
+        for x in range(self._capacity):
+            if self._states[x] == LIVE:
+                yield HashEntry(self._keys[x], self._values[x], self._hashes[x])
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput / get / remove")
+    print("------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(25):
+        m.put('key' + str(i), i * 10)
+    print(m.get_size(), m.get_capacity(), m.get('key7'), m.contains_key('key30'))
+    m.remove('key7')
+    print(m.get_size(), m.empty_buckets(), m.get('key7'), m.contains_key('key7'))
+
+    print("\nresize / get_keys_and_values")
+    print("----------------------------")
+    m = HashMap(11, hash_function_1)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    m.resize_table(23)
+    print(m.get_capacity(), m.get_keys_and_values())
+    for item in m:
+        print('K:', item.key, 'V:', item.value)
@@ -0,0 +1,355 @@
+# Course:      CS261 - Data Structures
+# Assignment:  6
+# Description: Open addressing hashmap using Robin Hood hashing. Probing is
+#              linear, every slot records how far its entry sits from its
+#              home slot, and an insert takes the slot of any entry closer
+#              to home than itself. Removal shifts the following entries
+#              back instead of leaving tombstones, so the table runs safely
+#              at high load. Offers the basic methods of the HashMap in
+#              hash_map_oa.py, the batch methods, with_expected_size, a
+#              max_load grow limit, min_load shrinking, probe_lengths and
+#              iteration over HashEntry objects. Probing is always Robin
+#              Hood linear, and it has no incremental rehashing, stats,
+#              upserts, views, copy or save and load.
+
+from a6_include import (DynamicArray, HashEntry, as_list, hash_many,
+                        batch_capacity, check_min_load, new_key_count, fitted_capacity, grown_capacity,
+                        expected_capacity, next_prime, shrunk_capacity,
+                        hash_function_1, hash_function_2)
+
+
+# Probe distance stored for a slot with no entry
+EMPTY = -1
+
+
+def _check_max_load(max_load: float) -> None:
+    """Raise ValueError unless 0 < max_load <= 1. Above 1 the table fills before it grows."""
+    if not 0 < max_load <= 1:
+        raise ValueError(f"max_load must be above 0 and at most 1, not {max_load}")
+
+
+class HashMap:
+    def __init__(self, capacity: int, function,
+                 max_load: float = 0.85,
+                 min_load: float = 0.0) -> None:
+        """
+        Initialize new HashMap that uses
+        Robin Hood linear probing for collision resolution.
+        The table doubles once the load reaches max_load.
+        When min_load is above 0, remove and clear shrink the table once
+        the load drops below it, never going under the starting capacity.
+        max_load must be above 0 and at most 1, and min_load must be below
+        a quarter of it
+        """
+        _check_max_load(max_load)
+        # capacity must be a prime number
+        self._capacity = next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._size = 0
+        self._max_load = max_load
+        self._min_capacity = self._capacity
+        check_min_load(min_load, self._max_load)
+        self._min_load = min_load
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._dists[i] == EMPTY:
+                out += str(i) + ': None\n'
+            else:
+                out += str(i) + ': K: ' + str(self._keys[i]) + ' V: ' + str(self._values[i]) \
+                       + ' D: ' + str(self._dists[i]) + '\n'
+        return out
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Method to create empty slot arrays for the given capacity
+        """
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._hashes = [0] * capacity
+        self._dists = [EMPTY] * capacity
+
+    @classmethod
+    def with_expected_size(cls, n: int, max_load: float = 0.85,
+                           function: callable = hash_function_1, **options) -> "HashMap":
+        """
+        Method to build a map sized for n keys, so putting them never grows the table. The capacity is the first
+        growth ladder prime of at least n / max_load, and max_load is also used as the grow limit
+        """
+        _check_max_load(max_load)
+        return cls(expected_capacity(n, max_load), function, max_load=max_load, **options)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Method to update key/value pairs in hash map. Grows the table once the load reaches max_load
+        """
+        if self.table_load() >= self._max_load:
+            self._rehash(grown_capacity(self._capacity))
+
+        key_hash = self._hash_function(key)
+        index = self._find_index(key, key_hash)
+        if index != -1:
+            self._values[index] = value
+        else:
+            self._place(key, value, key_hash)
+            self._size += 1
+
+    def _place(self, key: str, value: object, key_hash: int) -> None:
+        """
+        Method to insert a key that is not in the table. Walking forward from its home slot, the entry being
+        carried swaps places with any entry that is closer to its own home, and the entry swapped out is carried
+        on from there
+        """
+        keys, values, hashes, dists = self._keys, self._values, self._hashes, self._dists
+        capacity = self._capacity
+        index = key_hash % capacity
+        dist = 0
+        while dists[index] != EMPTY:
+            if dists[index] < dist:
+                keys[index], key = key, keys[index]
+                values[index], value = value, values[index]
+                hashes[index], key_hash = key_hash, hashes[index]
+                dists[index], dist = dist, dists[index]
+            index += 1
+            if index == capacity:
+                index = 0
+            dist += 1
+
+        keys[index] = key
+        values[index] = value
+        hashes[index] = key_hash
+        dists[index] = dist
+
+    def _find_index(self, key: str, key_hash: int = None) -> int:
+        """
+        Method to return the slot holding key, or -1 if absent. The search stops early at any entry closer to its
+        home than the key would be, since an insert of the key would have taken that slot
+        """
+        if key_hash is None:
+            key_hash = self._hash_function(key)
+        keys, hashes, dists = self._keys, self._hashes, self._dists
+        capacity = self._capacity
+        index = key_hash % capacity
+        dist = 0
+        while dists[index] >= dist:
+            if hashes[index] == key_hash and keys[index] == key:
+                return index
+            index += 1
+            if index == capacity:
+                index = 0
+            dist += 1
+        return -1
+
+    def table_load(self) -> float:
+        """
+        Method to return load factor for hash map
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Method to return the number of empty buckets for the hash map
+        """
+        return self._capacity - self._size
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Method to resize the hash table based on value given.
+        """
+        if new_capacity < self._size:
+            return
+
+        self._rehash(fitted_capacity(new_capacity, self._size, self._max_load))
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Method to place every entry into new arrays of the given capacity using its cached hash, without
+        duplicate or load checks
+        """
+        keys, values, hashes, dists = self._keys, self._values, self._hashes, self._dists
+        self._allocate(new_capacity)
+        self._capacity = new_capacity
+        for x in range(len(dists)):
+            if dists[x] != EMPTY:
+                self._place(keys[x], values[x], hashes[x])
+
+    def get(self, key: str) -> object:
+        """
+        Method to check for key in hash map and return its value if found
+        """
+        index = self._find_index(key)
+        if index == -1:
+            return None
+        return self._values[index]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Method to return True if a key is in the hash map
+        """
+        return self._find_index(key) != -1
+
+    def remove(self, key: str) -> None:
+        """
+        Method to search and remove key in the hash map
+        """
+        index = self._find_index(key)
+        if index != -1:
+            self._remove_at(index)
+            self._shrink()
+
+    def _remove_at(self, index: int) -> None:
+        """
+        Method to empty a slot with backward shift deletion. Each following entry that is away from its home
+        moves back one slot, until an empty slot or an entry at its home is reached
+        """
+        keys, values, hashes, dists = self._keys, self._values, self._hashes, self._dists
+        capacity = self._capacity
+        following = index + 1 if index + 1 < capacity else 0
+        while dists[following] > 0:
+            keys[index] = keys[following]
+            values[index] = values[following]
+            hashes[index] = hashes[following]
+            dists[index] = dists[following] - 1
+            index = following
+            following = index + 1 if index + 1 < capacity else 0
+
+        keys[index] = None
+        values[index] = None
+        dists[index] = EMPTY
+        self._size -= 1
+
+    def _shrink(self) -> None:
+        """
+        Method to shrink the table once the load falls below min_load (see shrunk_capacity)
+        """
+        new_capacity = shrunk_capacity(self._size, self._capacity, self._min_capacity, self._min_load)
+        if new_capacity is not None:
+            self._rehash(new_capacity)
+
+    def put_many(self, pairs) -> None:
+        """
+        Method to add a batch of (key, value) pairs, given as a DynamicArray or any iterable. The table is grown
+        once for the whole batch and all keys are hashed together
+        """
+        pairs = as_list(pairs)
+        keys = [pair[0] for pair in pairs]
+        hashes = hash_many(self._hash_function, keys)
+        # Grow once for the whole batch, so no put in it has to. Room is only given to the distinct keys not held
+        # yet, and those are only counted when the batch could need more room at all
+        if batch_capacity(self._size, len(pairs), self._capacity, self._max_load) is not None:
+            count = new_key_count(keys, hashes, lambda key, key_hash: self._find_index(key, key_hash) != -1)
+            new_capacity = batch_capacity(self._size, count, self._capacity, self._max_load)
+            if new_capacity is not None:
+                self.resize_table(new_capacity)
+
+        for x in range(len(pairs)):
+            key, value = pairs[x]
+            index = self._find_index(key, hashes[x])
+            if index != -1:
+                self._values[index] = value
+            else:
+                self._place(key, value, hashes[x])
+                self._size += 1
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Method to look up a batch of keys, given as a DynamicArray or any iterable. Return a dynamic array with
+        the value of each key in the same order, or None where the key is not found
+        """
+        keys = as_list(keys)
+        hashes = hash_many(self._hash_function, keys)
+        da = DynamicArray()
+        for x in range(len(keys)):
+            index = self._find_index(keys[x], hashes[x])
+            da.append(self._values[index] if index != -1 else None)
+        return da
+
+    def remove_many(self, keys) -> None:
+        """
+        Method to remove a batch of keys, given as a DynamicArray or any iterable. The table is only checked for
+        shrinking once, after the whole batch
+        """
+        keys = as_list(keys)
+        hashes = hash_many(self._hash_function, keys)
+        for x in range(len(keys)):
+            index = self._find_index(keys[x], hashes[x])
+            if index != -1:
+                self._remove_at(index)
+        self._shrink()
+
+    def clear(self) -> None:
+        """
+        Method to clear the hash map. If shrinking is on, go back to the starting capacity
+        """
+        if self._min_load > 0:
+            self._capacity = self._min_capacity
+        self._allocate(self._capacity)
+        self._size = 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Method to return a dynamic array with key/value pairs
+        """
+        da = DynamicArray()
+        for x in range(self._capacity):
+            if self._dists[x] != EMPTY:
+                da.append((self._keys[x], self._values[x]))
+        return da
+
+    def probe_lengths(self) -> DynamicArray:
+        """
+        Method to return a dynamic array with the number of slots a successful lookup of each key visits
+        """
+        da = DynamicArray()
+        for x in range(self._capacity):
+            if self._dists[x] != EMPTY:
+                da.append(self._dists[x] + 1)
+        return da
+
+    def __iter__(self):
+        """
+        Method to iterate through the entries of the hash map. Each one is handed out as a HashEntry
+        """
+        for x in range(self._capacity):
+            if self._dists[x] != EMPTY:
+                yield HashEntry(self._keys[x], self._values[x], self._hashes[x])
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput / get / remove")
+    print("------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(25):
+        m.put('key' + str(i), i * 10)
+    print(m.get_size(), m.get_capacity(), round(m.table_load(), 2), m.get('key7'), m.contains_key('key30'))
+    m.remove('key7')
+    print(m.get_size(), m.empty_buckets(), m.get('key7'), m.contains_key('key7'))
+
+    print("\nprobe lengths")
+    print("-------------")
+    lengths = m.probe_lengths()
+    print(max(lengths[i] for i in range(lengths.length())))
+    print(m)
@@ -0,0 +1,294 @@
+# Course:      CS261 - Data Structures
+# Assignment:  6
+# Description: Separate chaining hashmap whose buckets are compact flat
+#              lists ([hash, key, value, hash, key, value, ...]) created
+#              on first use, instead of one LinkedList per bucket and one
+#              SLNode per entry. Offers the basic methods of the HashMap
+#              in hash_map_sc.py, the batch methods and min_load
+#              shrinking. It has no with_expected_size, iteration,
+#              incremental rehashing, stats, upserts, views, copy or save
+#              and load.
+
+from a6_include import (DynamicArray, as_list, hash_many,
+                        batch_capacity, check_min_load, new_key_count, fitted_capacity, grown_capacity,
+                        next_prime, shrunk_capacity,
+                        hash_function_1, hash_function_2)
+
+
+# Every entry takes this many consecutive slots in its bucket list
+_STRIDE = 3
+
+
+class HashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 min_load: float = 0.0) -> None:
+        """
+        Initialize new HashMap that uses
+        separate chaining for collision resolution with array buckets.
+        A bucket stays None until a key is put in it.
+        When min_load is above 0, remove and clear shrink the table once
+        the load drops below it, never going under the starting capacity.
+        min_load must be below 0.25, a quarter of the 1.0 load limit
+        """
+        # capacity must be a prime number
+        self._capacity = next_prime(capacity)
+        self._buckets = [None] * self._capacity
+
+        self._hash_function = function
+        self._size = 0
+        self._min_capacity = self._capacity
+        check_min_load(min_load, 1.0)
+        self._min_load = min_load
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            bucket = self._buckets[i] or []
+            content = ', '.join('(' + str(bucket[x + 1]) + ': ' + str(bucket[x + 2]) + ')'
+                                for x in range(0, len(bucket), _STRIDE))
+            out += str(i) + ': [' + content + ']\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _find(bucket: list, key: str, key_hash: int) -> int:
+        """
+        Method to return the position of key's hash slot in a bucket, or -1 if the key is not in it
+        """
+        if bucket is not None:
+            for x in range(0, len(bucket), _STRIDE):
+                if bucket[x] == key_hash and bucket[x + 1] == key:
+                    return x
+        return -1
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Method to add key/value to a hash map. Update if key already present and double the size if parameters met.
+        """
+        if self.table_load() >= 1.0:
+            self._rehash(grown_capacity(self._capacity))
+
+        self._insert(key, value, self._hash_function(key))
+
+    def _insert(self, key: str, value: object, key_hash: int) -> None:
+        """
+        Method to add or update key/value using an already computed hash of the key. Does not check the load
+        """
+        hash = key_hash % self._capacity
+        bucket = self._buckets[hash]
+
+        x = self._find(bucket, key, key_hash)
+        if x != -1:
+            bucket[x + 2] = value
+        elif bucket is None:
+            self._buckets[hash] = [key_hash, key, value]
+            self._size += 1
+        else:
+            bucket.extend((key_hash, key, value))
+            self._size += 1
+
+    def empty_buckets(self) -> int:
+        """
+        Method to return the amount of empty buckets
+        """
+        empty = 0
+        for bucket in self._buckets:
+            if not bucket:
+                empty += 1
+        return empty
+
+    def table_load(self) -> float:
+        """
+        Method to return the load factor of the table
+        """
+        return self._size/self._capacity
+
+    def clear(self) -> None:
+        """
+        Method to clear hash table without changing capacity, unless shrinking is on. Then it goes back to the
+        starting capacity
+        """
+        if self._min_load > 0:
+            self._capacity = self._min_capacity
+        self._buckets = [None] * self._capacity
+        self._size = 0
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Method to resize hash table based on new capacity given
+        """
+        # If new size is less than 1, do nothing
+        if new_capacity < 1:
+            return
+
+        self._rehash(fitted_capacity(new_capacity, self._size, 1.0))
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Method to move every entry into a new bucket array of the given capacity using its cached hash, without
+        duplicate or load checks
+        """
+        buckets = [None] * new_capacity
+        for bucket in self._buckets:
+            if bucket is None:
+                continue
+            for x in range(0, len(bucket), _STRIDE):
+                hash = bucket[x] % new_capacity
+                if buckets[hash] is None:
+                    buckets[hash] = bucket[x:x + _STRIDE]
+                else:
+                    buckets[hash].extend(bucket[x:x + _STRIDE])
+
+        self._capacity = new_capacity
+        self._buckets = buckets
+
+    def get(self, key: str):
+        """
+        Method to return a value for the given key. Return none if not found
+        """
+        key_hash = self._hash_function(key)
+        bucket = self._buckets[key_hash % self._capacity]
+
+        # Walk the bucket inline, lookups are the hot path
+        if bucket is not None:
+            for x in range(0, len(bucket), _STRIDE):
+                if bucket[x] == key_hash and bucket[x + 1] == key:
+                    return bucket[x + 2]
+        return None
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Method to determine if given key is in hash map
+        """
+        key_hash = self._hash_function(key)
+        return self._find(self._buckets[key_hash % self._capacity], key, key_hash) != -1
+
+    def remove(self, key: str) -> None:
+        """
+        Method to remove a given key from the hash table
+        """
+        if self._remove(key, self._hash_function(key)) is True:
+            self._shrink()
+
+    def _remove(self, key: str, key_hash: int) -> bool:
+        """
+        Method to remove key using an already computed hash. The last entry of the bucket is moved into the gap,
+        and a bucket left empty goes back to None. Return True if the key was removed
+        """
+        hash = key_hash % self._capacity
+        bucket = self._buckets[hash]
+
+        x = self._find(bucket, key, key_hash)
+        if x == -1:
+            return False
+
+        bucket[x:x + _STRIDE] = bucket[-_STRIDE:]
+        del bucket[-_STRIDE:]
+        if not bucket:
+            self._buckets[hash] = None
+        self._size -= 1
+        return True
+
+    def _shrink(self) -> None:
+        """
+        Method to shrink the table once the load falls below min_load (see shrunk_capacity)
+        """
+        new_capacity = shrunk_capacity(self._size, self._capacity, self._min_capacity, self._min_load)
+        if new_capacity is not None:
+            self._rehash(new_capacity)
+
+    def put_many(self, pairs) -> None:
+        """
+        Method to add a batch of (key, value) pairs, given as a DynamicArray or any iterable. The table is grown
+        once for the whole batch and all keys are hashed together
+        """
+        pairs = as_list(pairs)
+        keys = [pair[0] for pair in pairs]
+        hashes = hash_many(self._hash_function, keys)
+        # Grow once for the whole batch, so no put in it has to. Room is only given to the distinct keys not held
+        # yet, and those are only counted when the batch could need more room at all
+        if batch_capacity(self._size, len(pairs), self._capacity, 1.0) is not None:
+            count = new_key_count(keys, hashes, lambda key, key_hash: self._find(self._buckets[key_hash % self._capacity], key, key_hash) != -1)
+            new_capacity = batch_capacity(self._size, count, self._capacity, 1.0)
+            if new_capacity is not None:
+                self.resize_table(new_capacity)
+
+        for x in range(len(pairs)):
+            self._insert(pairs[x][0], pairs[x][1], hashes[x])
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Method to look up a batch of keys, given as a DynamicArray or any iterable. Return a dynamic array with
+        the value of each key in the same order, or None where the key is not found
+        """
+        keys = as_list(keys)
+        hashes = hash_many(self._hash_function, keys)
+        da = DynamicArray()
+        for x in range(len(keys)):
+            bucket = self._buckets[hashes[x] % self._capacity]
+            y = self._find(bucket, keys[x], hashes[x])
+            da.append(bucket[y + 2] if y != -1 else None)
+        return da
+
+    def remove_many(self, keys) -> None:
+        """
+        Method to remove a batch of keys, given as a DynamicArray or any iterable. The table is only checked for
+        shrinking once, after the whole batch
+        """
+        keys = as_list(keys)
+        hashes = hash_many(self._hash_function, keys)
+        for x in range(len(keys)):
+            self._remove(keys[x], hashes[x])
+        self._shrink()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Method to return a dynamic array with tuple of key/value pairs
+        """
+        da = DynamicArray()
+        for bucket in self._buckets:
+            if bucket is not None:
+                for x in range(0, len(bucket), _STRIDE):
+                    da.append((bucket[x + 1], bucket[x + 2]))
+        return da
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput / get / remove")
+    print("------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(25):
+        m.put('key' + str(i), i * 10)
+    print(m.empty_buckets(), m.get_size(), m.get_capacity(), m.get('key7'), m.contains_key('key30'))
+    m.remove('key7')
+    print(m.empty_buckets(), m.get_size(), m.get('key7'), m.contains_key('key7'))
+
+    print("\nresize / get_keys_and_values")
+    print("----------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    m.resize_table(1)
+    print(m.get_capacity(), m.get_keys_and_values())
+    print(m)
@@ -0,0 +1,499 @@
+# Course:      CS261 - Data Structures
+# Assignment:  6
+# Description: Thread safe separate chaining hashmap using lock striping.
+#              A fixed set of locks guards the buckets, bucket i by lock
+#              i % stripes, so threads working on different stripes do not
+#              wait for each other. Resizing and whole-table methods take
+#              every stripe. Offers put, get, contains_key, remove, the
+#              batch methods, with_expected_size, min_load shrinking and
+#              get_stats like the HashMap in hash_map_sc.py, but not its
+#              incremental rehashing, upserts, views or snapshots.
+
+import random
+import threading
+import time
+
+from a6_include import (DynamicArray, LinkedList, as_list, hash_many,
+                        batch_capacity, check_min_load, expected_capacity, new_key_count,
+                        fitted_capacity, grown_capacity, next_prime,
+                        shrunk_capacity, hash_function_1, hash_function_2)
+from hash_map_stats import HashMapStats, length_histogram
+
+
+class HashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 stripes: int = 16,
+                 min_load: float = 0.0,
+                 stats: bool = False) -> None:
+        """
+        Initialize new HashMap that uses
+        separate chaining for collision resolution and
+        stripes locks to guard its buckets.
+        Each stripe keeps its own entry count, so get_size
+        adds them up instead of taking a lock, and with stats
+        set its own counters, which get_stats adds up.
+        When min_load is above 0, remove and clear shrink the table once
+        the load drops below it, never going under the starting capacity.
+        min_load must be below 0.25, a quarter of the 1.0 load limit
+        """
+        # capacity must be a prime number
+        self._capacity = next_prime(capacity)
+        self._buckets = DynamicArray([LinkedList() for _ in range(self._capacity)])
+
+        self._hash_function = function
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._counts = [0] * stripes
+
+        check_min_load(min_load, 1.0)
+        self._min_capacity = self._capacity
+        self._min_load = min_load
+
+        self._stats = [HashMapStats() for _ in range(stripes)] if stats else None
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        self._lock_all()
+        try:
+            for i in range(self._capacity):
+                out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+        finally:
+            self._unlock_all()
+        return out
+
+    @classmethod
+    def with_expected_size(cls, n: int, max_load: float = 1.0,
+                           function: callable = hash_function_1, **options) -> "HashMap":
+        """
+        Method to build a map sized for n keys, so putting them never grows the table. The capacity is the first
+        growth ladder prime of at least n / max_load (max_load is capped at the 1.0 grow limit). Other options
+        are passed on to the constructor
+        """
+        return cls(expected_capacity(n, min(max_load, 1.0)), function, **options)
+
+    def get_size(self) -> int:
+        """
+        Return size of map. Taken without locks, so while other threads are writing it is the size at some
+        moment during the call
+        """
+        return sum(self._counts)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _lock_bucket(self, key_hash: int) -> tuple:
+        """
+        Method to take the stripe lock guarding the bucket of a hash. Return the stripe index and the bucket.
+        A resize can swap the table between reading the capacity and getting the lock, so the capacity is
+        checked again once the lock is held and the bucket is looked up afresh if it changed
+        """
+        while True:
+            capacity = self._capacity
+            index = key_hash % capacity
+            stripe = index % len(self._locks)
+            self._locks[stripe].acquire()
+            # Resizes hold every stripe, so the table cannot change while this one is held
+            if capacity == self._capacity:
+                return stripe, self._buckets[index]
+            self._locks[stripe].release()
+
+    def _lock_all(self) -> None:
+        """
+        Method to take every stripe lock, always in the same order so two threads doing it cannot deadlock
+        """
+        for lock in self._locks:
+            lock.acquire()
+
+    def _unlock_all(self) -> None:
+        """
+        Method to release every stripe lock
+        """
+        for lock in self._locks:
+            lock.release()
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Method to add key/value to a hash map. Update if key already present and double the size if parameters met.
+        """
+        if self.get_size() / self._capacity >= 1.0:
+            self._grow()
+
+        self._insert(key, value, self._hash_function(key))
+
+    def _insert(self, key: str, value: object, key_hash: int) -> None:
+        """
+        Method to add or update key/value using an already computed hash of the key, under the key's stripe
+        lock. Does not check the load
+        """
+        stripe, bucket = self._lock_bucket(key_hash)
+        try:
+            node = bucket.contains(key, key_hash)
+            if node is not None:
+                node.value = value
+            else:
+                bucket.insert(key, value, key_hash)
+                self._counts[stripe] += 1
+        finally:
+            self._locks[stripe].release()
+
+    def _grow(self) -> None:
+        """
+        Method to double the table under every stripe lock. Another thread may have grown it while this one was
+        waiting, so the load is checked again first
+        """
+        self._lock_all()
+        try:
+            if sum(self._counts) / self._capacity >= 1.0:
+                self._rehash(grown_capacity(self._capacity))
+        finally:
+            self._unlock_all()
+
+    def empty_buckets(self) -> int:
+        """
+        Method to return the amount of empty buckets
+        """
+        self._lock_all()
+        try:
+            empty = 0
+            for x in range(self._capacity):
+                if self._buckets[x].length() == 0:
+                    empty += 1
+            return empty
+        finally:
+            self._unlock_all()
+
+    def table_load(self) -> float:
+        """
+        Method to return the load factor of the table
+        """
+        return self.get_size()/self._capacity
+
+    def clear(self) -> None:
+        """
+        Method to clear hash table without changing capacity, unless shrinking is on. Then it goes back to the
+        starting capacity
+        """
+        self._lock_all()
+        try:
+            if self._min_load > 0:
+                self._capacity = self._min_capacity
+            self._buckets = DynamicArray([LinkedList() for _ in range(self._capacity)])
+            self._counts = [0] * len(self._locks)
+        finally:
+            self._unlock_all()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Method to resize hash table based on new capacity given. Holds every stripe lock while it runs
+        """
+        # If new size is less than 1, do nothing
+        if new_capacity < 1:
+            return
+
+        self._lock_all()
+        try:
+            self._rehash(fitted_capacity(new_capacity, sum(self._counts), 1.0))
+        finally:
+            self._unlock_all()
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Method to move every node into a new bucket array of the given capacity using its cached hash. The
+        caller must hold every stripe lock. The stripe counts are rebuilt, as nodes change stripe when they move
+        """
+        started = time.perf_counter() if self._stats is not None else 0.0
+        buckets = DynamicArray([LinkedList() for _ in range(new_capacity)])
+        counts = [0] * len(self._locks)
+
+        # The iterator steps past each node before it is handed out, so relinking it here is safe
+        for x in range(self._capacity):
+            if self._buckets[x].length() > 0:
+                for node in self._buckets[x]:
+                    index = node.hash % new_capacity
+                    buckets[index].insert_node(node)
+                    counts[index % len(counts)] += 1
+
+        self._buckets = buckets
+        self._counts = counts
+        # Set last, as other threads check it to see whether the bucket they locked is still current
+        self._capacity = new_capacity
+        if self._stats is not None:
+            self._stats[0].record_resize(time.perf_counter() - started)
+
+    def get(self, key: str):
+        """
+        Method to return a value for the given key. Return none if not found
+        """
+        node = self._find_node(key, self._hash_function(key))
+        return node.value if node is not None else None
+
+    def _find_node(self, key: str, key_hash: int):
+        """
+        Method to return the node holding key, or None if not found, looked up under the key's stripe lock
+        """
+        stripe, bucket = self._lock_bucket(key_hash)
+        try:
+            node = bucket.contains(key, key_hash)
+            if self._stats is not None:
+                self._stats[stripe].record_lookup(node is not None)
+            return node
+        finally:
+            self._locks[stripe].release()
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Method to determine if given key is in hash map
+        """
+        return self._find_node(key, self._hash_function(key)) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Method to remove a given key from the hash table
+        """
+        if self._remove(key, self._hash_function(key)) is True:
+            self._shrink()
+
+    def _remove(self, key: str, key_hash: int) -> bool:
+        """
+        Method to remove key using an already computed hash, under the key's stripe lock. Return True if the
+        key was removed
+        """
+        stripe, bucket = self._lock_bucket(key_hash)
+        try:
+            if bucket.remove(key, key_hash) is True:
+                self._counts[stripe] -= 1
+                return True
+            return False
+        finally:
+            self._locks[stripe].release()
+
+    def _shrink(self) -> None:
+        """
+        Method to shrink the table under every stripe lock once the load falls below min_load (see
+        shrunk_capacity). The load is checked again once the locks are held, as other threads may have put keys
+        """
+        if self._min_load <= 0 or self.get_size() / self._capacity >= self._min_load:
+            return
+        self._lock_all()
+        try:
+            new_capacity = shrunk_capacity(sum(self._counts), self._capacity, self._min_capacity, self._min_load)
+            if new_capacity is not None:
+                self._rehash(new_capacity)
+        finally:
+            self._unlock_all()
+
+    def put_many(self, pairs) -> None:
+        """
+        Method to add a batch of (key, value) pairs, given as a DynamicArray or any iterable. The table is grown
+        once for the whole batch and all keys are hashed together. Each pair is added under its own stripe lock,
+        so other threads can see part of the batch before the rest
+        """
+        pairs = as_list(pairs)
+        keys = [pair[0] for pair in pairs]
+        hashes = hash_many(self._hash_function, keys)
+        self._lock_all()
+        try:
+            # Grow once for the whole batch, so no put in it has to. Room is only given to the distinct keys not
+            # held yet, and those are only counted when the batch could need more room at all
+            size = sum(self._counts)
+            if batch_capacity(size, len(pairs), self._capacity, 1.0) is not None:
+                # Every stripe lock is held, so the buckets are read directly
+                count = new_key_count(keys, hashes, lambda key, key_hash:
+                                      self._buckets[key_hash % self._capacity].contains(key, key_hash) is not None)
+                new_capacity = batch_capacity(size, count, self._capacity, 1.0)
+                if new_capacity is not None:
+                    self._rehash(fitted_capacity(new_capacity, size, 1.0))
+        finally:
+            self._unlock_all()
+
+        for x in range(len(pairs)):
+            self._insert(pairs[x][0], pairs[x][1], hashes[x])
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Method to look up a batch of keys, given as a DynamicArray or any iterable. Return a dynamic array with
+        the value of each key in the same order, or None where the key is not found
+        """
+        keys = as_list(keys)
+        hashes = hash_many(self._hash_function, keys)
+        da = DynamicArray()
+        for x in range(len(keys)):
+            node = self._find_node(keys[x], hashes[x])
+            da.append(node.value if node is not None else None)
+        return da
+
+    def remove_many(self, keys) -> None:
+        """
+        Method to remove a batch of keys, given as a DynamicArray or any iterable. The table is only checked for
+        shrinking once, after the whole batch
+        """
+        keys = as_list(keys)
+        hashes = hash_many(self._hash_function, keys)
+        for x in range(len(keys)):
+            self._remove(keys[x], hashes[x])
+        self._shrink()
+
+    def get_stats(self) -> dict:
+        """
+        Method to return a snapshot dict of the map, taken with every stripe locked: size, capacity, load and the
+        distribution of chain lengths as length -> number of buckets. For a map created with stats=True it also
+        holds the hit/miss and resize counters of all stripes added up
+        """
+        self._lock_all()
+        try:
+            snapshot = {}
+            if self._stats is not None:
+                total = HashMapStats()
+                for stats in self._stats:
+                    total.merge(stats)
+                snapshot = total.snapshot()
+                # Probing and tombstones only apply to open addressing
+                del snapshot['probe_lengths'], snapshot['tombstone_reuses']
+
+            size = sum(self._counts)
+            snapshot.update(size=size, capacity=self._capacity, load=size / self._capacity,
+                            chain_lengths=length_histogram(self._buckets[x].length() for x in range(self._capacity)))
+            return snapshot
+        finally:
+            self._unlock_all()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Method to return a dynamic array with tuple of key/value pairs, taken with every stripe locked so it is
+        a consistent snapshot
+        """
+        self._lock_all()
+        try:
+            da = DynamicArray()
+            for x in range(self._capacity):
+                for node in self._buckets[x]:
+                    da.append((node.key, node.value))
+            return da
+        finally:
+            self._unlock_all()
+
+
+def _run_threads(threads: int, worker: callable) -> list:
+    """
+    Method to run worker(number) on the given number of threads at once and wait for them all. Return the
+    AssertionErrors they raised
+    """
+    errors = []
+
+    def run(number: int) -> None:
+        try:
+            worker(number)
+        except AssertionError as error:
+            errors.append(error)
+
+    workers = [threading.Thread(target=run, args=(number,)) for number in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return errors
+
+
+def stress_test(threads: int = 8, operations: int = 5000, seed: int = 261, shared_keys: int = 64) -> None:
+    """
+    Method to run random operations from many threads at once, starting from small tables so they are resized
+    while the threads run. Raises AssertionError on a mismatch.
+
+    In the first phase each thread owns its own keys and checks every value it reads back, and the final
+    contents are checked against what each thread last wrote. In the second phase every thread puts, reads and
+    removes the same shared_keys keys, singly and in batches, so threads keep meeting on the same buckets and
+    locks. Values there name their key, so a read must never see another key's value, and each key must end
+    up as some thread's last change to it left it
+    """
+    m = HashMap(11, hash_function_2)
+    expected = [dict() for _ in range(threads)]
+
+    def worker(number: int) -> None:
+        rng = random.Random(seed + number)
+        mine = expected[number]
+        for i in range(operations):
+            key = 'thread' + str(number) + '-' + str(rng.randrange(operations // 4))
+            roll = rng.random()
+            if roll < 0.5:
+                m.put(key, i)
+                mine[key] = i
+            elif roll < 0.8:
+                assert m.get(key) == mine.get(key), key
+                assert m.contains_key(key) == (key in mine), key
+            else:
+                m.remove(key)
+                mine.pop(key, None)
+
+    errors = _run_threads(threads, worker)
+    assert not errors, errors
+    merged = {key: value for mine in expected for key, value in mine.items()}
+    pairs = m.get_keys_and_values()
+    assert m.get_size() == len(merged) == pairs.length()
+    assert {pairs[i][0]: pairs[i][1] for i in range(pairs.length())} == merged
+
+    m = HashMap(11, hash_function_2, min_load=0.2)
+    # Each thread's last change to each shared key it touched, None for a remove
+    last = [dict() for _ in range(threads)]
+
+    def shared_worker(number: int) -> None:
+        rng = random.Random(seed + threads + number)
+        mine = last[number]
+        for i in range(operations):
+            keys = ['shared-' + str(rng.randrange(shared_keys)) for _ in range(rng.randint(1, 4))]
+            roll = rng.random()
+            if roll < 0.4:
+                m.put(keys[0], (keys[0], number, i))
+                mine[keys[0]] = (keys[0], number, i)
+            elif roll < 0.5:
+                m.put_many((key, (key, number, i)) for key in keys)
+                mine.update((key, (key, number, i)) for key in keys)
+            elif roll < 0.75:
+                value = m.get(keys[0])
+                assert value is None or value[0] == keys[0], (keys[0], value)
+            elif roll < 0.8:
+                values = m.get_many(keys)
+                for x in range(len(keys)):
+                    assert values[x] is None or values[x][0] == keys[x], (keys[x], values[x])
+            elif roll < 0.95:
+                m.remove(keys[0])
+                mine[keys[0]] = None
+            else:
+                m.remove_many(keys)
+                mine.update((key, None) for key in keys)
+
+    errors = _run_threads(threads, shared_worker)
+    assert not errors, errors
+    pairs = m.get_keys_and_values()
+    final = {pairs[i][0]: pairs[i][1] for i in range(pairs.length())}
+    assert m.get_size() == len(final) == pairs.length()
+    for key in set().union(*last):
+        assert final.get(key) in [mine[key] for mine in last if key in mine], key
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput / get / remove")
+    print("------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(25):
+        m.put('key' + str(i), i * 10)
+    print(m.empty_buckets(), m.get_size(), m.get_capacity(), m.get('key7'), m.contains_key('key30'))
+    m.remove('key7')
+    print(m.empty_buckets(), m.get_size(), m.get('key7'), m.contains_key('key7'))
+
+    print("\nstress test")
+    print("-----------")
+    for threads in (1, 2, 4, 8, 16):
+        stress_test(threads)
+        print(threads, 'threads ok')
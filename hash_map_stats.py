@@ -0,0 +1,73 @@
+# Course:      CS261 - Data Structures
+# Assignment:  6
+# Description: Opt-in counters for the HashMaps. A map created with
+#              stats=True updates a HashMapStats as it works, and its
+#              get_stats() method returns a plain dict snapshot that can
+#              be exported to monitoring.
+
+
+class HashMapStats:
+    """
+    Counters kept by a HashMap created with stats=True
+    """
+
+    def __init__(self) -> None:
+        """Initialize all counters to zero."""
+        self.hits = 0
+        self.misses = 0
+        self.resizes = 0
+        self.resize_seconds = 0.0
+        self.max_resize_seconds = 0.0
+        self.tombstone_reuses = 0
+
+        # Number of slots visited by each probe sequence, as length -> count
+        self.probe_lengths = {}
+
+    def record_lookup(self, found: bool) -> None:
+        """Count a lookup as a hit or a miss."""
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def record_probe(self, length: int) -> None:
+        """Add one probe sequence of the given length to the histogram."""
+        self.probe_lengths[length] = self.probe_lengths.get(length, 0) + 1
+
+    def record_resize(self, seconds: float) -> None:
+        """Count a resize or rehash of the table and how long it took."""
+        self.resizes += 1
+        self.resize_seconds += seconds
+        if seconds > self.max_resize_seconds:
+            self.max_resize_seconds = seconds
+
+    def merge(self, other: "HashMapStats") -> None:
+        """Add the counters of another HashMapStats to these ones."""
+        self.hits += other.hits
+        self.misses += other.misses
+        self.resizes += other.resizes
+        self.resize_seconds += other.resize_seconds
+        self.max_resize_seconds = max(self.max_resize_seconds, other.max_resize_seconds)
+        self.tombstone_reuses += other.tombstone_reuses
+        for length, count in other.probe_lengths.items():
+            self.probe_lengths[length] = self.probe_lengths.get(length, 0) + count
+
+    def snapshot(self) -> dict:
+        """Return the counters as a new dict."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'resizes': self.resizes,
+            'resize_seconds': self.resize_seconds,
+            'max_resize_seconds': self.max_resize_seconds,
+            'tombstone_reuses': self.tombstone_reuses,
+            'probe_lengths': dict(sorted(self.probe_lengths.items())),
+        }
+
+
+def length_histogram(lengths) -> dict:
+    """Return a length -> count dict, sorted by length, for an iterable of lengths."""
+    histogram = {}
+    for length in lengths:
+        histogram[length] = histogram.get(length, 0) + 1
+    return dict(sorted(histogram.items()))
@@ -0,0 +1,118 @@
+# Course:      CS261 - Data Structures
+# Assignment:  6
+# Description: Iterators and lazy keys/values/items views shared by the
+#              HashMaps. Each iterator keeps its own cursor, so any number
+#              can run over the same map at once, and the views stream
+#              entries from the live map instead of copying them. A map
+#              counts every change to which keys it holds or where they
+#              sit in its table, and an iterator that sees the count move
+#              raises ConcurrentModificationError.
+#
+#              A map using these provides:
+#                _version             the change count
+#                _entries()           generator of its live entries (objects
+#                                     with key and value attributes)
+#                _finish_migration()  completes any incremental rehash
+#                get_size(), contains_key(key) and get(key)
+
+
+class ConcurrentModificationError(RuntimeError):
+    """
+    Raised by a HashMap iterator when the map was changed after the
+    iterator was created
+    """
+    pass
+
+
+class HashMapIterator:
+    """
+    Separate iterator for a HashMap, handing out each live entry, key,
+    value or (key, value) pair once
+    """
+
+    def __init__(self, map, kind: str = 'entries') -> None:
+        """
+        Initialize the iterator over map. kind is one of 'entries', 'keys', 'values' or 'items'
+        """
+        # Moving the rest of an incremental rehash over now, before the version is taken, so that walking a
+        # single table sees every entry
+        map._finish_migration()
+        self._map = map
+        self._version = map._version
+        self._entries = map._entries()
+        self._kind = kind
+
+    def __iter__(self) -> "HashMapIterator":
+        """Return the iterator."""
+        return self
+
+    def __next__(self):
+        """Obtain the next entry in the form asked for and advance the iterator."""
+        if self._map._version != self._version:
+            raise ConcurrentModificationError("HashMap changed during iteration")
+
+        entry = next(self._entries)
+        if self._kind == 'keys':
+            return entry.key
+        if self._kind == 'values':
+            return entry.value
+        if self._kind == 'items':
+            return entry.key, entry.value
+        return entry
+
+
+class KeysView:
+    """
+    Lazy view of the keys of a HashMap. It reads the live map, so it
+    reflects changes made after it was created
+    """
+
+    _kind = 'keys'
+
+    def __init__(self, map) -> None:
+        """Initialize the view of map."""
+        self._map = map
+
+    def __iter__(self) -> HashMapIterator:
+        """Return a new iterator over the map."""
+        return HashMapIterator(self._map, self._kind)
+
+    def __len__(self) -> int:
+        """Return the number of entries in the map."""
+        return self._map.get_size()
+
+    def __contains__(self, key: str) -> bool:
+        """Return True if key is in the map."""
+        return self._map.contains_key(key)
+
+    def __repr__(self) -> str:
+        """Return the view as its class name and a list of what it holds."""
+        return type(self).__name__ + '(' + str(list(self)) + ')'
+
+
+class ValuesView(KeysView):
+    """
+    Lazy view of the values of a HashMap
+    """
+
+    _kind = 'values'
+
+    def __contains__(self, value: object) -> bool:
+        """Return True if any key of the map has the value."""
+        for item in self:
+            if item == value:
+                return True
+        return False
+
+
+class ItemsView(KeysView):
+    """
+    Lazy view of the (key, value) pairs of a HashMap
+    """
+
+    _kind = 'items'
+
+    def __contains__(self, item: tuple) -> bool:
+        """Return True if the map holds the key of a (key, value) pair with that value."""
+        key, value = item
+        return self._map.contains_key(key) and self._map.get(key) == value